@@ -0,0 +1,59 @@
+"""
+Benchmark suite. Run from the repository root:
+
+    python -m benchmarks                          # everything, report in benchmarks/results/
+    python -m benchmarks --only matching,apply    # a subset
+    python -m benchmarks --compare old.json new.json
+
+Everything runs headless: the UI is the game simulator and OCR crops are replayed.
+"""
+import argparse
+import importlib
+import os
+import time
+
+from benchmarks.harness import REPO_ROOT, compare, environment, report, write_report
+
+SUITES = ["ocr", "matching", "navigation", "apply"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Loadout manager benchmarks")
+    parser.add_argument("--only", default=",".join(SUITES), help=f"comma separated subset of {SUITES}")
+    parser.add_argument("--repeat", type=int, default=20, help="timed repetitions per benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic databases")
+    parser.add_argument("--output", help="report path (default: benchmarks/results/<commit>_<time>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two reports and exit")
+    parser.add_argument("--recordings", help="folder of recorded .npz crops for the OCR benchmark")
+    parser.add_argument("--real-ocr", action="store_true", help="use the configured recognizers (EasyOCR)")
+    parser.add_argument("--loadout", help="loadout file for the apply benchmark (default: loadouts/gl_medic.json)")
+    parser.add_argument("--latency", type=float, default=0.03, help="simulated render latency in seconds")
+    parser.add_argument("--apply-runs", type=int, default=3, help="full applies to time")
+    parser.add_argument("--apply-items", type=int, default=60, help="items per simulated database")
+    parser.add_argument("--trace", action="store_true", help="write a trace per apply (off: tracing skews timings)")
+    return parser.parse_args()
+
+
+def main():
+    options = parse_args()
+    if options.compare:
+        compare(*options.compare)
+        return
+
+    results = {}
+    for suite in [name.strip() for name in options.only.split(",") if name.strip()]:
+        if suite not in SUITES:
+            report(f"Unknown benchmark suite '{suite}'. Choose from {SUITES}.")
+            continue
+        report(f"[{suite}]")
+        module = importlib.import_module(f"benchmarks.bench_{suite}")
+        results.update(module.run(options))
+
+    commit = environment()["commit"] or "nogit"
+    output = options.output or os.path.join(REPO_ROOT, "benchmarks", "results",
+                                            f"{commit}_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    report(f"Report written to {write_report(results, output, vars(options))}")
+
+
+if __name__ == "__main__":
+    main()
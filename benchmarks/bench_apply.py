@@ -0,0 +1,47 @@
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.harness import summarize, report, REPO_ROOT
+from game_simulator import GameSimulator, make_databases, loadout_items, write_databases
+from loadout_selection import LoadoutManager, apply_loadout
+from utils import ConfigManager
+
+
+def run(options):
+    """
+    Full apply_loadout against the simulator: a first apply onto a different loadout, then the
+    same loadout again (the differential apply path).
+    """
+    results = {}
+    with open(options.loadout or os.path.join(REPO_ROOT, "loadouts", "gl_medic.json"), "r") as f:
+        loadout = json.load(f)
+    dbs = make_databases(items_per_db=options.apply_items, seed=options.seed, include=loadout_items(loadout))
+
+    first, repeat, presses = [], [], []
+    for _ in range(options.apply_runs):
+        with tempfile.TemporaryDirectory() as folder, GameSimulator(dbs, latency=options.latency) as simulator:
+            write_databases(dbs, folder)
+            ConfigManager.overrides["controls"]["TRACE RUNS"] = options.trace
+            manager = LoadoutManager(None, db_folder=folder)
+
+            start = time.perf_counter()
+            apply_loadout(manager, loadout)
+            first.append(time.perf_counter() - start)
+            presses.append(len(simulator.key_log))
+            if manager.degraded_dbs:
+                report(f"  WARNING: degraded slots {sorted(manager.degraded_dbs)}; timings are not comparable.")
+
+            # Back to the loadout screen's start, as after a new mission
+            simulator.tab, simulator.slot = "required", [0, 0]
+            start = time.perf_counter()
+            apply_loadout(manager, loadout)
+            repeat.append(time.perf_counter() - start)
+
+    suffix = f"latency{int(options.latency * 1000)}ms"
+    results[f"apply.full.{suffix}"] = dict(summarize(first), key_presses=presses[-1])
+    results[f"apply.repeat.{suffix}"] = summarize(repeat)
+    report(f"  first apply {results[f'apply.full.{suffix}']['median_ms'] / 1000:7.2f}s ({presses[-1]} presses), "
+           f"repeat {results[f'apply.repeat.{suffix}']['median_ms'] / 1000:7.2f}s")
+    return results
@@ -0,0 +1,95 @@
+import json
+import os
+import random
+import tempfile
+
+from benchmarks.harness import measure, report
+from fuzzy_index import MatchIndex
+from game_simulator import make_databases, write_databases
+from item_store import ItemDatabaseStore, search_items
+from loadout_selection import LoadoutManager
+
+SIZES = (50, 500, 5000)
+
+
+def _ocr_noise(name, rng):
+    """A plausible misread: one character dropped and one swapped for a look-alike."""
+    chars = list(name)
+    if len(chars) > 4:
+        del chars[rng.randrange(len(chars))]
+    lookalikes = {"O": "0", "I": "1", "S": "5", "B": "8", "V": "U", "E": "F"}
+    spots = [idx for idx, char in enumerate(chars) if char in lookalikes]
+    if spots:
+        idx = rng.choice(spots)
+        chars[idx] = lookalikes[chars[idx]]
+    return "".join(chars)
+
+
+def queries_for(db, rng, count=30):
+    """Exact names, OCR-noisy names and short partial names ('FRAG' style), in equal parts."""
+    names = rng.sample(list(db), min(count, len(db)))
+    third = len(names) // 3
+    return (names[:third] +
+            [_ocr_noise(name, rng) for name in names[third:2 * third]] +
+            [name.split()[-1] for name in names[2 * third:]])
+
+
+def run(options):
+    results = {}
+    rng = random.Random(options.seed)
+
+    for size in SIZES:
+        dbs = make_databases(items_per_db=size, seed=options.seed)
+        db = dbs["primary"]
+        queries = queries_for(db, rng)
+        index = MatchIndex(db.keys())
+
+        results[f"matching.index_build.n{size}"] = measure(lambda: MatchIndex(db.keys()),
+                                                           repeat=max(3, options.repeat // 4))
+
+        # One lookup of every query, with the per-query memo cleared so each one is really scored
+        def lookups():
+            for query in queries:
+                LoadoutManager._find_best_match(query, index)
+        stats = measure(lookups, repeat=options.repeat, setup=index._results.clear)
+        stats["queries"] = len(queries)
+        results[f"matching.best_match.n{size}"] = stats
+
+        # Loadout creator search: the same query mix, armor style (name + type + passive)
+        armor = dbs["armor"]
+        search_queries = queries_for(armor, rng, count=9)
+
+        def searches():
+            for query in search_queries:
+                search_items(armor, query, "armor")
+        stats = measure(searches, repeat=max(3, options.repeat // 2))
+        stats["queries"] = len(search_queries)
+        results[f"search.update_search.n{size}"] = stats
+
+        # Startup: the eight JSON files plus a match index, against the memory-mapped pack
+        with tempfile.TemporaryDirectory() as folder:
+            write_databases(dbs, folder)
+            ItemDatabaseStore(folder).refresh()
+
+            def load_json():
+                loaded = {}
+                for filename in os.listdir(folder):
+                    if filename.endswith("_db.json"):
+                        with open(os.path.join(folder, filename), "r") as f:
+                            loaded[filename] = json.load(f)
+                return MatchIndex(loaded["primary_db.json"].keys())
+
+            def load_pack():
+                store = ItemDatabaseStore(folder)
+                store.refresh()
+                return store.index("primary")
+
+            repeat = max(3, options.repeat // 4)
+            results[f"store.load.json.n{size}"] = measure(load_json, repeat=repeat)
+            results[f"store.load.pack.n{size}"] = measure(load_pack, repeat=repeat)
+
+        report(f"  n={size:<5} best_match {results[f'matching.best_match.n{size}']['median_ms']:9.3f}ms "
+               f"search {results[f'search.update_search.n{size}']['median_ms']:9.3f}ms "
+               f"load json {results[f'store.load.json.n{size}']['median_ms']:9.3f}ms "
+               f"pack {results[f'store.load.pack.n{size}']['median_ms']:9.3f}ms")
+    return results
@@ -0,0 +1,37 @@
+import random
+
+from benchmarks.harness import measure, report
+from game_simulator import make_databases, SIM_CATEGORIES
+from nav_planner import GridModel, plan_moves
+
+SIZES = (50, 500)
+
+
+def run(options):
+    """Route planning as done by LoadoutManager._move_cursor, for tabbed and flat menus."""
+    results = {}
+    rng = random.Random(options.seed)
+
+    for size in SIZES:
+        dbs = make_databases(items_per_db=size, seed=options.seed)
+        for db_key in ("primary", "booster"):
+            db = dbs[db_key]
+            category = SIM_CATEGORIES[db_key][0] if db_key in SIM_CATEGORIES else None
+            model = GridModel.from_db(db, category)
+            cells = [details["pos"] for details in db.values() if category is None or details["cat"] == category]
+            routes = [(rng.choice(cells), rng.choice(cells)) for _ in range(50)]
+
+            def plan_all(allow_wrap=True):
+                return [plan_moves(start, target, model, allow_wrap=allow_wrap) for start, target in routes]
+
+            kind = "tabbed" if category else "flat"
+            stats = measure(plan_all, repeat=options.repeat)
+            # Route quality next to the speed: fewer presses is what the planner is for
+            stats["routes"] = len(routes)
+            stats["mean_presses"] = round(sum(map(len, plan_all())) / len(routes), 2)
+            stats["mean_presses_direct"] = round(sum(map(len, plan_all(False))) / len(routes), 2)
+            results[f"navigation.plan_moves.{kind}.n{size}"] = stats
+
+            report(f"  n={size:<5} {kind:<6} plan {stats['median_ms']:8.3f}ms for {len(routes)} routes, "
+                   f"{stats['mean_presses']} presses (direct {stats['mean_presses_direct']})")
+    return results
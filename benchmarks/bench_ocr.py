@@ -0,0 +1,84 @@
+import glob
+import os
+import tempfile
+
+import numpy as np
+
+from benchmarks.harness import measure, report
+from database_mapper import ocr_from_screen
+from game_simulator import GameSimulator, SimulatedRecognizer, SIM_BOXES, make_databases
+from ocr_cache import frame_cache, disk_cache
+from recognizers import recognizer_chain, set_recognizers
+from screen_capture import ReplayBackend, set_backend
+from utils import RegionOfInterest
+
+
+def _record_synthetic_crops(folder, count, seed):
+    """Renders item-name crops with the simulator and saves them the way RecordingBackend does."""
+    simulator = GameSimulator({})
+    names = list(make_databases(items_per_db=count, seed=seed)["primary"])
+    left, top, width, height = SIM_BOXES["item"]
+    for idx, name in enumerate(names[:count]):
+        crop = simulator._text_box("item", name, "normal")
+        np.savez(os.path.join(folder, f"frame_{idx:06d}.npz"), frame=crop, origin=np.array([left, top]))
+    return simulator, RegionOfInterest((left, top, width, height), "PRIMARY_ITEM_ROI")
+
+
+def run(options):
+    """
+    ocr_from_screen on recorded crops, through a ReplayBackend.
+    Uses --recordings (a RecordingBackend folder of same-size crops) if given, otherwise crops
+    rendered by the simulator. --real-ocr runs the configured recognizers (EasyOCR), otherwise
+    the simulator's exact recognizer, which leaves only the capture/preprocess/cache overhead.
+    """
+    results = {}
+    previous_recognizers = list(recognizer_chain.recognizers)
+    # Benchmark frames must not end up in the real disk cache
+    disk_cache.detach()
+
+    with tempfile.TemporaryDirectory() as folder:
+        if options.recordings:
+            paths = sorted(glob.glob(os.path.join(options.recordings, "*.npz")))
+            with np.load(paths[0], allow_pickle=False) as data:
+                origin = tuple(int(v) for v in data["origin"]) if "origin" in data else (0, 0)
+                height, width = data["frame"].shape[:2]
+            roi = RegionOfInterest((origin[0], origin[1], width, height))
+            simulator = None
+            source = options.recordings
+        else:
+            simulator, roi = _record_synthetic_crops(folder, 40, options.seed)
+            source = folder
+
+        replay = ReplayBackend(source)
+        frame_count = len(replay.frames)
+        previous_backend = set_backend(replay)
+        if not options.real_ocr:
+            if simulator is None:
+                report("  --recordings without --real-ocr: nothing can read them. Skipping OCR benchmark.")
+                set_backend(previous_backend)
+                return results
+            set_recognizers([SimulatedRecognizer(simulator)])
+
+        try:
+            def read_all():
+                for _ in range(frame_count):
+                    ocr_from_screen(roi)
+
+            recognizer = "real" if options.real_ocr else "simulated"
+            # Every crop recognized from scratch
+            stats = measure(read_all, repeat=max(3, options.repeat // 4), warmup=1, setup=frame_cache.clear)
+            stats["frames"] = frame_count
+            results[f"ocr.ocr_from_screen.cold.{recognizer}"] = stats
+
+            # Every crop already in the in-memory cache
+            stats = measure(read_all, repeat=options.repeat, warmup=1)
+            stats["frames"] = frame_count
+            results[f"ocr.ocr_from_screen.cached.{recognizer}"] = stats
+
+            report(f"  {frame_count} crops: cold {results[f'ocr.ocr_from_screen.cold.{recognizer}']['median_ms']:9.3f}ms "
+                   f"cached {stats['median_ms']:9.3f}ms ({recognizer} recognizer)")
+        finally:
+            set_backend(previous_backend)
+            set_recognizers(previous_recognizers)
+            frame_cache.clear()
+    return results
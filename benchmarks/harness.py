@@ -0,0 +1,99 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+# Importing the app redirects print() to helldivers_loadout_manager.log, which is where the
+# app's own output should keep going. Benchmark output goes straight to the console.
+import environment_setup  # noqa: E402,F401
+
+
+def report(message=""):
+    sys.__stdout__.write(f"{message}\n")
+    sys.__stdout__.flush()
+
+
+def summarize(samples):
+    """Timing statistics in milliseconds."""
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 4),
+        "median_ms": round(statistics.median(ordered) * 1000, 4),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4)
+    }
+
+
+def measure(fn, repeat=20, warmup=2, setup=None):
+    """
+    Times fn() `repeat` times after `warmup` untimed calls.
+    setup() runs before every call, outside the timing (e.g. to clear a cache).
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True, text=True,
+                              timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def environment():
+    """Where and on what the numbers were taken, so runs can be compared across commits."""
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+
+
+def write_report(results, path, options=None):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "options": options or {}, "results": results}, f, indent=4)
+    return path
+
+
+def compare(old_path, new_path):
+    """Prints the median of every benchmark the two reports share, and the change."""
+    with open(old_path, "r") as f:
+        old = json.load(f)
+    with open(new_path, "r") as f:
+        new = json.load(f)
+
+    report(f"{'benchmark':<52} {old['environment'].get('commit', 'old'):>12} "
+           f"{new['environment'].get('commit', 'new'):>12}   change")
+    for name in sorted(set(old["results"]) & set(new["results"])):
+        before = old["results"][name].get("median_ms")
+        after = new["results"][name].get("median_ms")
+        if before is None or after is None:
+            continue
+        change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+        report(f"{name:<52} {before:>10.3f}ms {after:>10.3f}ms   {change}")
@@ -1,29 +1,106 @@
-import json
 import os.path
-import time
-
-# noinspection PyPackageRequirements
-import cv2
-import easyocr
-import numpy as np
-import pyautogui
-import pydirectinput
+import json
+from concurrent.futures import Future, ThreadPoolExecutor
+
 from thefuzz import fuzz
 
+import key_input
 from environment_setup import get_base_path
-from utils import ConfigurationError, focus_hd2_win, ConfigManager, ROIOverlay
-
-# Activate failsafe
-pyautogui.FAILSAFE = True
-pyautogui.PAUSE = 0.1
+from mapping_journal import MappingJournal
+from nav_planner import GridModel, save_grid_metadata, load_grid_metadata
+from ocr_cache import frame_cache, text_signature, frame_hash, disk_cache, signature_distance
+from preprocessing import preprocess
+from recognizers import recognizer_chain, template_recognizer
+from screen_capture import grab_frame, grab_rois, union_region
+import tracing
+from tracing import tracer, traced
+from ui_sync import press_and_settle, trim_edges, CHANGE_THRESHOLD
+from utils import ConfigurationError, ConfigManager, ROIOverlay, write_json_atomic
+
+# Largest signature difference between two captures of the same cell
+SAME_CELL_DISTANCE = CHANGE_THRESHOLD
+# Columns a row may have before its wrap is also checked by OCR text (twice this cuts the row off)
+MAX_ROW_COLUMNS = 12
+
+
+def recognize_frames(frames, learn_template=False):
+    """
+    Turns already captured ROI frames into text: the ROI's preprocessing pipeline, in-process
+    cache, disk cache, then the recognizer chain (templates first, EasyOCR as the fallback) for all misses in one batch.
+    frames: {name: (frame, roi_key)}. Returns {name: text}.
+    """
+    # Preprocess first so the caches and recognizers all see the cleaned-up crop
+    with tracer.span("preprocess", "ocr", frames=len(frames)):
+        frames = {name: (preprocess(frame, roi_key), roi_key) for name, (frame, roi_key) in frames.items()}
+
+    texts = {}
+    misses = []
+    with tracer.span("ocr cache", "ocr", frames=len(frames)) as span:
+        for name, (frame, roi_key) in frames.items():
+            # Identical (or near-identical) frames were already read: reuse the text. Signed
+            # without the edges, like MappingPipeline.capture, so the overlay border can't miss.
+            signature = text_signature(trim_edges(frame))
+            digest = frame_hash(signature)
+            text = frame_cache.get(signature, digest)
+            if text is None:
+                # Seen in an earlier session?
+                text = disk_cache.get(digest)
+                if text is None:
+                    misses.append((name, signature, digest))
+                    continue
+                frame_cache.put(signature, text, digest)
+            texts[name] = text
+        span.set(misses=len(misses))
+
+    if misses:
+        # Known item names are matched against their templates first; EasyOCR is the fallback
+        with tracer.span("recognize", "ocr", frames=len(misses)) as span:
+            results = recognizer_chain.recognize_many([frames[name] for name, _, _ in misses])
+            span.set(sources=",".join(sorted({source for _, source in results})))
+        for (name, signature, digest), (text, source) in zip(misses, results):
+            disk_cache.put(digest, text)
+            frame_cache.put(signature, text, digest)
+            if learn_template and source == "easyocr":
+                frame, roi_key = frames[name]
+                template_recognizer.learn(frame, roi_key, text)
+            texts[name] = text
+
+    return texts
+
+def recognize_frame(frame, roi_key=None, learn_template=False):
+    """Single-frame recognize_frames()."""
+    return recognize_frames({roi_key: (frame, roi_key)}, learn_template)[roi_key]
+
+@traced("ocr_many", "ocr")
+def ocr_many(rois, roi_overlay=None, learn_template=False, grab=None):
+    """
+    Reads several ROIs from one capture, recognizing them as one batch.
+    rois: {name: (left, top, width, height)}
+    grab: an existing screen_capture.FrameGrab covering every ROI; skips the capture
+    Returns {name: text}.
+    """
+    for roi_coords in rois.values():
+        if not roi_coords or any(v <= 0 for v in roi_coords[2:]):
+            raise ConfigurationError(f"Invalid ROI: {roi_coords}.")
 
-# Initialize the reader once (set gpu=True if you have an NVIDIA GPU)
-reader = easyocr.Reader(['en'], gpu=False, verbose=False)
+    if roi_overlay:
+        roi_overlay.show_at(roi_coords=union_region(list(rois.values())))
 
+    try:
+        grab = grab or grab_rois(list(rois.values()))
+        frames = {name: (grab.view(roi_coords), getattr(roi_coords, "key", None))
+                  for name, roi_coords in rois.items()}
+        return recognize_frames(frames, learn_template)
+    finally:
+        if roi_overlay:
+            roi_overlay.fade_out()
 
-def ocr_from_screen(roi_coords, roi_overlay=None):
+@traced("ocr_from_screen", "ocr")
+def ocr_from_screen(roi_coords, roi_overlay=None, learn_template=False, frame=None):
     """
     roi_coords: (left, top, width, height)
+    learn_template: store the crop as a word template when EasyOCR had to read it
+    frame: an already captured view of this ROI (see screen_capture.grab_rois); skips the capture
     """
 
     # 1. Validation Check
@@ -35,34 +112,10 @@ def ocr_from_screen(roi_coords, roi_overlay=None):
 
     try:
         # 2. Attempt the screenshot
-        screenshot = pyautogui.screenshot(region=roi_coords)
-        if screenshot is None:
-            raise ConfigurationError(f"Failed to capture screenshot at {roi_coords}.")
-
-        frame = np.array(screenshot)
-        if frame.size == 0:
-            raise ConfigurationError(f"Captured frame is empty at {roi_coords}.")
-
-        # Begin processing
-        frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-
-        # Perform OCR on the whole 'frame'
-        hd_allowlist = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-&/ "
-        results = reader.readtext(frame, detail=0, paragraph=True, allowlist=hd_allowlist)
+        if frame is None:
+            frame = grab_frame(roi_coords)
 
-        # Process Text
-        raw_text = " ".join(results) if results else ""
-        text = raw_text.upper()
-
-        font_corrections = {
-            "HEAUY": "HEAVY", "ADUANCED": "ADVANCED", "CONCUSSIUE": "CONCUSSIVE",
-            "SERUICE": "SERVICE", "EUAC": "EVAC", "EUIDENCE": "EVIDENCE",
-            "OFFENSIUE": "OFFENSIVE", "DEFENSIUE": "DEFENSIVE", "SERUO": "SERVO",
-            "HOUER": "HOVER"
-        }
-
-        for error, correction in font_corrections.items():
-            text = text.replace(error, correction)
+        text = recognize_frame(frame, getattr(roi_coords, "key", None), learn_template)
 
         if roi_overlay:
             roi_overlay.fade_out()
@@ -73,12 +126,316 @@ def ocr_from_screen(roi_coords, roi_overlay=None):
         if roi_overlay:
             roi_overlay.fade_out()
 
-def map_categorized_grid(db_name, item_roi, cat_roi, category_list, perk_roi=None, overlay_tool=None):
+
+class CellCapture:
+    """One capture of the ROIs at a cursor position: signatures now, OCR text once a worker read it."""
+    def __init__(self, signatures, future):
+        self.signatures = signatures
+        self.future = future
+
+    @classmethod
+    def known(cls, texts):
+        """A cell taken from the existing database instead of the screen (incremental mapping)."""
+        future = Future()
+        future.set_result(texts)
+        return cls({}, future)
+
+    def texts(self):
+        """{name: text}. Blocks only if the workers haven't got to this capture yet."""
+        if not self.future.done():
+            with tracer.span("wait for ocr", "ocr"):
+                return self.future.result()
+        return self.future.result()
+
+    def same_as(self, other, name="item"):
+        """Cheap check that two captures show the same thing, without waiting for OCR (edges trimmed)."""
+        return signature_distance(self.signatures[name], other.signatures[name]) <= SAME_CELL_DISTANCE
+
+
+class MappingPipeline:
+    """
+    Overlaps OCR with navigation while mapping: the mapper captures a cell and moves on, while
+    worker threads ("OCR WORKERS", default 1) recognize the queued captures. End-of-row and tab
+    changes are decided by comparing capture signatures, so the mapper rarely waits for a read.
+    Every read of a mapping run goes through the workers, so a single worker keeps EasyOCR on one thread.
+    Every capture grabs all the ROIs, so the overlay border sits at the same place in each of them.
+    rois: {name: roi_coords}
+    """
+    def __init__(self, rois, overlay_tool=None, workers=1):
+        self.rois = rois
+        self.overlay_tool = overlay_tool
+        self.pool = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="mapper-ocr")
+
+    def capture(self, names=None):
+        """Grabs every ROI in one capture and queues the named ones (default: all) for OCR."""
+        if self.overlay_tool:
+            self.overlay_tool.show_at(roi_coords=union_region(list(self.rois.values())))
+        try:
+            grab = grab_rois(list(self.rois.values()))
+        finally:
+            if self.overlay_tool:
+                self.overlay_tool.fade_out()
+
+        frames = {name: (grab.view(roi_coords), getattr(roi_coords, "key", None))
+                  for name, roi_coords in self.rois.items()}
+        signatures = {name: text_signature(trim_edges(frame)) for name, (frame, _) in frames.items()}
+        reads = {name: frames[name] for name in names or self.rois}
+        # Mapping reads are what teaches the template recognizer new item names
+        return CellCapture(signatures, self.pool.submit(recognize_frames, reads, True))
+
+    def read(self, names=None):
+        """Captures and waits for the text, for decisions that need it (e.g. finding a tab)."""
+        return self.capture(names).texts()
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+        # The templates the run learned are written once, not on every read
+        template_recognizer.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+def _is_b01_row(anchor):
+    # Every B-01 cell reads the same, so those rows can't end on a repeat of their first cell
+    return "B-01" in anchor.texts()["item"]
+
+
+def _collect_cells(master_db, cells, cat_name=None):
+    """Adds the recognized cells to the database in visiting order, so an item's first sighting wins."""
+    for row, col, capture in cells:
+        texts = capture.texts()
+        current_item = texts["item"]
+        if not current_item or current_item in master_db:
+            continue
+
+        if cat_name is None:
+            master_db[current_item] = {"pos": [row, col]}
+            print(f"Mapped: {current_item} at {row}, {col}")
+            continue
+
+        master_db[current_item] = {"cat": cat_name, "pos": [row, col]}
+        # For armor specifically, we will map the passive to make it easier to search through
+        if texts.get("perk"):
+            master_db[current_item]["passive"] = texts["perk"]
+            print(f"Passive found: {texts['perk']}")
+        print(f"[{cat_name}] Mapped: {current_item} at {row}, {col}")
+
+
+def _confirm_rows(pending, journal, cat_name=None, wait=False):
+    """
+    Checkpoints finished rows, in order, once their reads are in. Without wait it stops at the
+    first row the OCR workers are still on, so checkpoints don't hold up navigation.
+    pending: [(row length, uncertain, cells)]
+    """
+    while pending:
+        row_length, uncertain, cells = pending[0]
+        if not wait and not all(capture.future.done() for _, _, capture in cells):
+            break
+        pending.pop(0)
+        _collect_cells(journal.master_db, cells, cat_name)
+        journal.record_row(cat_name or "", row_length, uncertain)
+
+
+def _open_journal(db_path, categories, resume):
+    journal = MappingJournal.load(db_path, categories) if resume else None
+    if journal is None:
+        return MappingJournal(db_path, categories)
+    print(f"Resuming interrupted mapping: {journal.summary()}")
+    return journal
+
+
+def _load_existing(db_path):
+    """Incremental mapping: the current database and its grid metadata, or ({}, {}) if there is nothing to compare against."""
+    try:
+        with open(db_path, "r") as f:
+            db = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        db = {}
+    grids = load_grid_metadata(db_path) if db else {}
+    if not grids:
+        print("No mapped database with grid metadata to compare against. Mapping everything.")
+        return {}, {}
+    return db, grids
+
+
+def _known_rows(db, grid, category=""):
+    """
+    The rows of one grid in the database, as (first item, [(name, details)] in column order).
+    B-01 rows and rows where a duplicate item was skipped have no cells and are always walked;
+    rows without a known first item are None.
+    """
+    cells = {(details.get("cat", ""), *details["pos"]): (name, details) for name, details in db.items()}
+    rows = []
+    for row, length in enumerate(grid.row_lengths):
+        row_cells = [cells.get((category, row, col)) for col in range(length)]
+        if not row_cells or row_cells[0] is None:
+            rows.append(None)
+            continue
+        complete = row not in grid.uncertain_rows and all(row_cells)
+        rows.append((row_cells[0][0], row_cells if complete else None))
+    return rows
+
+
+def _skip_rows(count, item_roi, config):
+    """Moves the cursor down past rows an interrupted run already confirmed."""
+    if count:
+        print(f"Skipping {count} row(s) mapped before the interruption.")
+    for _ in range(count):
+        press_and_settle(config.get_control("DOWN","s"), item_roi, config.get_control("OCR READ DELAY", 0.3))
+
+
+def _trailing_unchanged(pipeline, expected, item_roi, names, config, fuzzy_threshold):
+    """
+    Incremental mapping: checks the last cell of a known row. LEFT wraps onto it and RIGHT back
+    onto the first cell, so the cursor ends where it started.
+    """
+    press_and_settle(config.get_control("LEFT","a"), item_roi, config.get_control("OCR READ DELAY", 0.3))
+    trailing = pipeline.capture(names)
+    press_and_settle(config.get_control("RIGHT","d"), item_roi, config.get_control("OCR READ DELAY", 0.3))
+    return fuzz.ratio(trailing.texts()["item"], expected[-1][0]) > fuzzy_threshold
+
+
+def _walk_row(pipeline, row, row_anchor, item_roi, names, config):
+    """
+    Captures a row cell by cell, from its first cell until the cursor wraps back onto it.
+    Past MAX_ROW_COLUMNS the wrap is also recognized by the OCR text, in case the signatures
+    missed it, and at twice that the row is cut off.
+    """
+    cells = []
+    capture = row_anchor
+    col = 0
+    while True:
+        cells.append((row, col, capture))
+        press_and_settle(config.get_control("RIGHT","d"), item_roi, config.get_control("OCR READ DELAY", 0.3))
+
+        # Have to hardcode the number of columns in the armor and helmet tables due to the B01s
+        if col > 1 and _is_b01_row(row_anchor):
+            break
+        # The capture for the end-of-row check is also the next cell's read
+        capture = pipeline.capture(names)
+        if capture.same_as(row_anchor) and not _is_b01_row(row_anchor):
+            break
+        col += 1
+        if col >= MAX_ROW_COLUMNS:
+            # The signatures may have missed the wrap: look for the first cell's text coming round again
+            anchor_text = row_anchor.texts()["item"]
+            seen = [cell for _, _, cell in cells[1:]] + [capture]
+            wrap = next((idx for idx, cell in enumerate(seen, 1)
+                         if anchor_text and fuzz.ratio(cell.texts()["item"], anchor_text) > 90), None)
+            if wrap is not None:
+                print(f"Row {row} wrapped after {wrap} columns (found by text).")
+                # Back onto the first cell, where the row walk normally ends
+                for _ in range(-col % wrap):
+                    press_and_settle(config.get_control("RIGHT","d"), item_roi, config.get_control("OCR READ DELAY", 0.3))
+                return cells[:wrap]
+            if col >= MAX_ROW_COLUMNS * 2:
+                print(f"Warning: row {row} never wrapped back to its first cell. Stopping it at {col} columns.")
+                break
+    return cells
+
+
+def _map_rows(pipeline, journal, capture, end_reached, item_roi, names, config, cat_name=None, known_rows=None,
+              fuzzy_threshold=85):
+    """
+    Maps a grid (or one tab of it) row by row, from the journal's first unconfirmed row until a
+    DOWN press lands on what end_reached(capture) recognizes as the end (another tab, or the top).
+    capture: capture of the current row's first cell
+    known_rows: incremental mapping (see _known_rows). A row keeps its database entries once the
+    next row still starts with the same item (the last row is checked by its last cell instead).
+    From the first row that doesn't, every row is walked, since the items after it shifted.
+    Returns True if the end was reached.
+    """
+    pending = []
+    # Last row taken from the database, until the row below confirms it
+    provisional = None
+    diverged = False
+    ended = False
+    for row in range(journal.rows_done(cat_name or ""), 35):
+        row_anchor = capture
+        in_db = bool(known_rows) and not diverged and row < len(known_rows)
+        known = known_rows[row] if in_db else None
+
+        if known and fuzz.ratio(row_anchor.texts()["item"], known[0]) > fuzzy_threshold:
+            # The row starts where it did, so the row above it didn't change
+            if provisional:
+                pending.append(provisional)
+                provisional = None
+            expected = known[1]
+            if expected and (row < len(known_rows) - 1 or
+                             _trailing_unchanged(pipeline, expected, item_roi, names, config, fuzzy_threshold)):
+                provisional = (len(expected), False,
+                               [(row, col, CellCapture.known({"item": name, "perk": details.get("passive")}))
+                                for col, (name, details) in enumerate(expected)])
+            else:
+                cells = _walk_row(pipeline, row, row_anchor, item_roi, names, config)
+                pending.append((len(cells), _is_b01_row(row_anchor), cells))
+        else:
+            if in_db:
+                print(f"Row {row} changed since the last mapping. Re-mapping from here.")
+                diverged = True
+                if provisional:
+                    # The change may have started at the end of the row above: walk that one again
+                    press_and_settle(config.get_control("UP","w"), item_roi, config.get_control("OCR READ DELAY", 0.3))
+                    above = pipeline.capture(names)
+                    cells = _walk_row(pipeline, row - 1, above, item_roi, names, config)
+                    pending.append((len(cells), _is_b01_row(above), cells))
+                    provisional = None
+                    press_and_settle(config.get_control("DOWN","s"), item_roi, config.get_control("OCR READ DELAY", 0.3))
+                    row_anchor = pipeline.capture(names)
+            elif provisional:
+                # Rows past the database's last one: that row already passed its last-cell check
+                pending.append(provisional)
+                provisional = None
+
+            cells = _walk_row(pipeline, row, row_anchor, item_roi, names, config)
+            # Record the row's shape for the navigator. B-01 rows end by count, not by wrapping.
+            pending.append((len(cells), _is_b01_row(row_anchor), cells))
+        _confirm_rows(pending, journal, cat_name)
+
+        press_and_settle(config.get_control("DOWN","s"), item_roi, config.get_control("OCR READ DELAY", 0.3))
+
+        # The same capture starts the next row
+        capture = pipeline.capture(names)
+        if end_reached(capture):
+            ended = True
+            break
+
+    if provisional:
+        if ended and row < len(known_rows) - 1:
+            print("Warning: the grid has fewer rows than when it was mapped. Map it in full if items are missing.")
+        pending.append(provisional)
+    _confirm_rows(pending, journal, cat_name, wait=True)
+    return ended
+
+
+def _write_database(db_path, master_db, journal):
+    # The database only ever changes in one step; the journal goes once it has
+    write_json_atomic(db_path, master_db)
+    journal.discard()
+
+    disk_cache.flush()
+    print(f"OCR cache: {frame_cache.stats()} Disk: {disk_cache.stats()}")
+
+
+@traced("map_categorized_grid", "mapping", ("db_name",))
+def map_categorized_grid(db_name, item_roi, cat_roi, category_list, perk_roi=None, overlay_tool=None,
+                         db_folder=None, resume=False, incremental=False):
     """
     Maps menus with tabs (e.g., Offensive, Defensive).
     Assumes starting at (0,0) in the first category.
+    db_folder: where to write the database (default: item_databases next to the app)
+    resume: continue from the journal an interrupted run left behind (see mapping_journal)
+    incremental: only walk the rows that changed since the existing database was mapped
     """
-    master_db = {}
+    db_path = os.path.join(db_folder or os.path.join(get_base_path(),"item_databases"),f"{db_name}.json")
+    journal = _open_journal(db_path, category_list, resume)
+    existing_db, existing_grids = _load_existing(db_path) if incremental else ({}, {})
+    grid_models = {}
     config = ConfigManager()
 
     if "strat" in db_name:
@@ -88,114 +445,104 @@ def map_categorized_grid(db_name, item_roi, cat_roi, category_list, perk_roi=Non
 
     # Give a waiting period before beginning operations
     print(f"\n--- Initializing {db_name} Mapping ---")
-    time.sleep(2)
-    focus_hd2_win()
-    time.sleep(.5)
-
-    for cat_name in category_list:
-        print(f"Mapping Category: {cat_name}")
-        cat_counter = 0
-
-        # Ensure we are in the right tab
-        while cat_counter < len(category_list)*2:
-            current_tab = ocr_from_screen(cat_roi, overlay_tool)
-            print(f"Have {current_tab} and want {cat_name}")
-            if fuzz.partial_ratio(cat_name.upper(), current_tab.upper()) > fuzzy_threshold:
-                cat_counter = -1
-                break
-            pydirectinput.press(config.get_control("MENU TAB RIGHT","c"))
-            time.sleep(config.get_control("CAT SWITCH DELAY",0.4))
-            cat_counter += 1
-
-        if cat_counter != -1:
-            print(f"Unable to find category {cat_name}. Skipping...")
-            continue
-
-        for row in range(35):
-            row_anchor = ocr_from_screen(item_roi, overlay_tool)
-            col = 0
-
-            while True:
-                current_item = ocr_from_screen(item_roi, overlay_tool)
-                current_passive = ocr_from_screen(perk_roi, overlay_tool) if perk_roi != (0,0,0,0) and perk_roi is not None else None
-                if current_item and current_item not in master_db:
-                    master_db[current_item] = {"cat": cat_name, "pos": [row, col]}
-                    # For armor specifically, we will map the passive to make it easier to search through
-                    if current_passive:
-                        master_db[current_item]["passive"] = current_passive
-                        print(f"Passive found: {current_passive}")
-                    print(f"[{cat_name}] Mapped: {current_item} at {row}, {col}")
-
-                pydirectinput.press(config.get_control("RIGHT","d"))
-                time.sleep(config.get_control("OCR READ DELAY", 0.3))
-
-                # Have to hardcode the number of columns in the armor table due to the B01s
-                if "B-01" not in row_anchor and fuzz.ratio(row_anchor, ocr_from_screen(item_roi, overlay_tool)) > fuzzy_threshold:
+    tracing.sleep(2)
+    key_input.focus_game()
+    tracing.sleep(.5)
+
+    # Everything shown at one cursor position is read from a single capture, in one batch
+    cell_names = ["item"]
+    rois = {"item": item_roi, "cat": cat_roi}
+    if perk_roi != (0,0,0,0) and perk_roi is not None:
+        cell_names.append("perk")
+        rois["perk"] = perk_roi
+
+    with MappingPipeline(rois, overlay_tool, config.get_control("OCR WORKERS", 1)) as pipeline:
+        for cat_name in category_list:
+            if cat_name in journal.done:
+                print(f"Category {cat_name} was mapped before the interruption. Skipping...")
+                grid_models[cat_name] = GridModel(wrap_rows=True, wrap_columns=False, **journal.grid(cat_name))
+                continue
+
+            print(f"Mapping Category: {cat_name}")
+            cat_counter = 0
+
+            # Ensure we are in the right tab
+            while cat_counter < len(category_list)*2:
+                current_tab = pipeline.read(["cat"])["cat"]
+                print(f"Have {current_tab} and want {cat_name}")
+                if fuzz.partial_ratio(cat_name.upper(), current_tab.upper()) > fuzzy_threshold:
+                    cat_counter = -1
                     break
-                elif "B-01" in row_anchor and col > 1:
-                    break
-                col += 1
+                press_and_settle(config.get_control("MENU TAB RIGHT","c"), cat_roi, config.get_control("CAT SWITCH DELAY",0.4))
+                cat_counter += 1
+
+            if cat_counter != -1:
+                print(f"Unable to find category {cat_name}. Skipping...")
+                continue
+
+            _skip_rows(journal.rows_done(cat_name), item_roi, config)
+
+            # The confirmed tab's header is what a category change is detected against
+            tab = pipeline.capture(cell_names)
+            known_rows = _known_rows(existing_db, existing_grids[cat_name], cat_name) \
+                if cat_name in existing_grids else None
+            # Category Change: If 'S' changes the category.
+            if _map_rows(pipeline, journal, tab, lambda capture: not capture.same_as(tab, "cat"), item_roi,
+                         cell_names, config, cat_name, known_rows, fuzzy_threshold):
+                print("Category change detected. Mapping complete.")
 
-            pydirectinput.press(config.get_control("DOWN","s"))
-            time.sleep(config.get_control("OCR READ DELAY", 0.3))
+            journal.finish_category(cat_name)
+            # Scrolling past the last row switches tabs, so tabbed grids never wrap vertically
+            grid_models[cat_name] = GridModel(wrap_rows=True, wrap_columns=False, **journal.grid(cat_name))
 
-            # Category Change: If 'S' changes the category
-            if fuzz.partial_ratio(cat_name, ocr_from_screen(cat_roi, overlay_tool)) < fuzzy_threshold:
-                print("Category change detected. Mapping complete.")
-                break
+    # Tabs this run couldn't reach keep what the database had
+    for name, details in existing_db.items():
+        if details.get("cat") not in grid_models and details.get("cat") in existing_grids:
+            journal.master_db.setdefault(name, details)
+    for cat_name, model in existing_grids.items():
+        grid_models.setdefault(cat_name, model)
 
-    with open(os.path.join(get_base_path(),"item_databases",f"{db_name}.json"), "w") as f:
-        json.dump(master_db, f, indent=4)
+    save_grid_metadata(db_path, grid_models)
+    _write_database(db_path, journal.master_db, journal)
 
     return True
 
-def map_flat_grid(db_name, item_roi, overlay_tool=None):
+@traced("map_flat_grid", "mapping", ("db_name",))
+def map_flat_grid(db_name, item_roi, overlay_tool=None, db_folder=None, resume=False, incremental=False):
     """
     Maps single-grid menus.
     Assumes starting at (0,0). Includes Vertical Rollover protection.
+    db_folder: where to write the database (default: item_databases next to the app)
+    resume: continue from the journal an interrupted run left behind (see mapping_journal)
+    incremental: only walk the rows that changed since the existing database was mapped
     """
-    master_db = {}
-    fuzzy_threshold = 85
+    db_path = os.path.join(db_folder or os.path.join(get_base_path(),"item_databases"),f"{db_name}.json")
+    journal = _open_journal(db_path, [], resume)
+    existing_db, existing_grids = _load_existing(db_path) if incremental else ({}, {})
     config = ConfigManager()
 
     # Give a waiting period before beginning operations
     print(f"\n--- Initializing {db_name} Mapping ---")
-    time.sleep(2)
-    focus_hd2_win()
-    time.sleep(0.5)
-
-    global_anchor = ocr_from_screen(item_roi, overlay_tool)
-    print(f"Starting Flat Map. Global Anchor: {global_anchor}")
-
-    for row in range(35):
-        row_anchor = ocr_from_screen(item_roi, overlay_tool)
-        col = 0
-
-        while True:
-            current_item = ocr_from_screen(item_roi, overlay_tool)
-            if current_item and current_item not in master_db:
-                master_db[current_item] = {"pos": [row, col]}
-                print(f"Mapped: {current_item} at {row}, {col}")
+    tracing.sleep(2)
+    key_input.focus_game()
+    tracing.sleep(0.5)
 
-            pydirectinput.press(config.get_control("RIGHT","d"))
-            time.sleep(config.get_control("OCR READ DELAY", 0.3))
+    with MappingPipeline({"item": item_roi}, overlay_tool, config.get_control("OCR WORKERS", 1)) as pipeline:
+        global_anchor = pipeline.capture()
+        print(f"Starting Flat Map. Global Anchor: {global_anchor.texts()['item']}")
 
-            # Have to hardcode the number of columns in the helmet table due to the B01s
-            if "B-01" not in row_anchor and fuzz.ratio(row_anchor, ocr_from_screen(item_roi, overlay_tool)) > fuzzy_threshold:
-                break
-            elif "B-01" in row_anchor and col > 1:
-                break
-            col += 1
-
-        pydirectinput.press(config.get_control("DOWN","s"))
-        time.sleep(config.get_control("OCR READ DELAY", 0.3))
+        first_row = journal.rows_done()
+        _skip_rows(first_row, item_roi, config)
 
+        known_rows = _known_rows(existing_db, existing_grids[""]) if "" in existing_grids else None
         # Vertical Rollover: Checks if 'S' wrapped us back to the very first item
-        if fuzz.ratio(global_anchor, ocr_from_screen(item_roi, overlay_tool)) > fuzzy_threshold:
+        rolled_over = _map_rows(pipeline, journal, pipeline.capture() if first_row else global_anchor,
+                                lambda capture: capture.same_as(global_anchor), item_roi, ["item"], config,
+                                known_rows=known_rows)
+        if rolled_over:
             print("Vertical Rollover detected. Mapping complete.")
-            break
 
-    with open(os.path.join(get_base_path(),"item_databases",f"{db_name}.json"), "w") as f:
-        json.dump(master_db, f, indent=4)
+    save_grid_metadata(db_path, {"": GridModel(wrap_rows=True, wrap_columns=rolled_over, **journal.grid())})
+    _write_database(db_path, journal.master_db, journal)
 
-    return True
\ No newline at end of file
+    return True
@@ -0,0 +1,118 @@
+from collections import defaultdict
+
+from thefuzz import fuzz
+from thefuzz import utils as fuzz_utils
+
+
+def normalize_key(key):
+    """Strips the (row-col) style suffix and upper-cases a DB key for matching."""
+    return key.split('(')[0].strip().upper()
+
+
+def ngrams(text, n=3):
+    """Character n-grams of the fuzz-processed text, padded so word starts and ends count."""
+    padded = f" {fuzz_utils.full_process(text)} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class MatchIndex:
+    """
+    Prebuilt lookup structure for one item database.
+    Keys are normalized once, exact hits are a dictionary lookup and fuzzy lookups only
+    score the keys that share enough character trigrams with the target.
+    Scores are identical to the old linear scan: WRatio plus 5 if the target is a substring.
+    """
+    def __init__(self, keys, min_overlap=0.34, full_scan_below=90, prebuilt=None):
+        """
+        prebuilt: (normalized keys, trigram count per key, {trigram: key indices}) computed ahead
+        of time, e.g. stored in the item pack, so only the exact-hit table is built here
+        """
+        self.keys = list(keys)
+        self.min_overlap = min_overlap
+        # Below this the best score is an ambiguous partial match, where ties are broken by
+        # DB order, so score every key to keep the linear scan's answer
+        self.full_scan_below = full_scan_below
+
+        if prebuilt:
+            normalized, gram_counts, self.postings = prebuilt
+            self.normalized = list(normalized)
+            self.gram_counts = list(gram_counts)
+        else:
+            self.normalized = [normalize_key(key) for key in self.keys]
+            self.postings = defaultdict(list)
+            self.gram_counts = []
+            for idx, clean_key in enumerate(self.normalized):
+                key_grams = ngrams(clean_key)
+                self.gram_counts.append(len(key_grams))
+                for gram in key_grams:
+                    self.postings[gram].append(idx)
+
+        self.exact = {}
+        for idx, clean_key in enumerate(self.normalized):
+            self.exact.setdefault(clean_key, idx)
+
+        self._results = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def candidates(self, target_clean):
+        """
+        Indices of related keys, in DB order. A key is related when it shares at least
+        min_overlap of the trigrams of the shorter of the two strings, since WRatio's
+        partial scoring rewards a short string fully contained in a long one.
+        """
+        target_grams = ngrams(target_clean)
+        if not target_grams:
+            return []
+
+        shared = defaultdict(int)
+        for gram in target_grams:
+            for idx in self.postings.get(gram, ()):
+                shared[idx] += 1
+
+        target_count = len(target_grams)
+        return sorted(
+            idx for idx, count in shared.items()
+            if count >= max(1, int(min(target_count, self.gram_counts[idx]) * self.min_overlap))
+        )
+
+    def _score(self, target_clean, indices):
+        best_match = None
+        highest_score = 0
+
+        for idx in indices:
+            clean_key = self.normalized[idx]
+            # WRatio handles case-insensitivity and partials 'FRAG' in 'G-6 FRAG'
+            score = fuzz.WRatio(target_clean, clean_key)
+
+            # We give a small boost if the shorthand is an exact substring
+            if target_clean in clean_key:
+                score += 5
+
+            if score > highest_score:
+                highest_score = score
+                best_match = self.keys[idx]
+
+        return best_match, highest_score
+
+    def best_match(self, target_name):
+        """Returns (best_key, score) for the target text."""
+        target_clean = target_name.upper().strip()
+        if target_clean in self._results:
+            return self._results[target_clean]
+
+        # 1. Exact hit: nothing can beat WRatio 100 + the substring bonus
+        if target_clean in self.exact and fuzz_utils.full_process(target_clean):
+            result = (self.keys[self.exact[target_clean]], 105)
+        else:
+            # 2. Score only the keys that look related
+            result = self._score(target_clean, self.candidates(target_clean))
+            if result[1] < self.full_scan_below:
+                result = self._score(target_clean, range(len(self.keys)))
+
+        # OCR noise can produce endless variants, so keep the memo bounded
+        if len(self._results) > 4096:
+            self._results.clear()
+        self._results[target_clean] = result
+        return result
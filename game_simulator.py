@@ -0,0 +1,512 @@
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+
+# noinspection PyPackageRequirements
+import cv2
+import numpy as np
+
+import key_input
+from item_store import DB_FILES
+from key_input import KeyInput
+from ocr_cache import frame_cache, disk_cache, frame_hash, text_signature
+from preprocessing import preprocess
+from recognizers import Recognizer, recognizer_chain, set_recognizers
+from screen_capture import CaptureBackend, set_backend
+from utils import ConfigManager, STRAT_CATS, PRIMARY_CATS, SECONDARY_CATS, GRENADE_CATS, ARMOR_CATS
+
+# Size of the simulated screen (width, height)
+SCREEN_SIZE = (1280, 720)
+BACKGROUND = (22, 18, 14)
+
+# Where the simulated screen draws each piece of text: (left, top, width, height)
+SIM_BOXES = {
+    "cat": (80, 60, 480, 32),
+    "item": (80, 120, 480, 32),
+    "perk": (80, 180, 480, 32),
+    "ready": (800, 620, 240, 40)
+}
+
+# Every calibrated ROI key and the box it looks at on the simulated screen
+SIM_ROIS = {
+    "STRAT_CAT_ROI": "cat", "STRAT_ITEM_ROI": "item",
+    "BOOSTER_ITEM_ROI": "item",
+    "PRIMARY_CAT_ROI": "cat", "PRIMARY_ITEM_ROI": "item",
+    "SECONDARY_CAT_ROI": "cat", "SECONDARY_ITEM_ROI": "item",
+    "GRENADE_CAT_ROI": "cat", "GRENADE_ITEM_ROI": "item",
+    "HELMET_ITEM_ROI": "item",
+    "ARMOR_CAT_ROI": "cat", "ARMOR_ITEM_ROI": "item", "ARMOR_PERK_ROI": "perk",
+    "CAPE_ITEM_ROI": "item",
+    "READY_ROI": "ready"
+}
+
+# Key bindings the simulator listens for (laid over settings.json while it is installed)
+SIM_CONTROLS = {"UP": "w", "DOWN": "s", "LEFT": "a", "RIGHT": "d", "ENTER MENU": "space",
+                "MENU TAB RIGHT": "c", "SWITCH": "q"}
+
+# Category tabs per database; flat menus have none
+SIM_CATEGORIES = {"stratagems": STRAT_CATS, "primary": PRIMARY_CATS, "secondary": SECONDARY_CATS,
+                  "grenade": GRENADE_CATS, "armor": ARMOR_CATS}
+
+# The loadout screen: the required tab is a row of slots, the equipment tab a grid of them
+REQUIRED_SLOTS = ["stratagems", "booster"]
+EQUIPMENT_SLOTS = [["helmet", "armor", "cape"], ["primary", "secondary", "grenade"]]
+STRATAGEM_SLOTS = 4
+
+TEXT_COLOURS = {"normal": (235, 235, 235), "greyed": (110, 110, 110), "highlight": (60, 220, 255)}
+
+# Building blocks for synthetic item names
+NAME_CODES = {"stratagems": "SG", "primary": "AR", "secondary": "P", "grenade": "G", "armor": "FS",
+              "booster": "BX", "helmet": "HM", "cape": "CP"}
+NAME_WORDS = ["ANVIL", "BASTION", "CITADEL", "DRIFTER", "EMBER", "FALCON", "GLACIER", "HARBINGER", "INFERNO",
+              "JAVELIN", "KESTREL", "LANTERN", "MERIDIAN", "NOMAD", "ONSLAUGHT", "PARAGON", "QUASAR", "RAMPART",
+              "SENTINEL", "TEMPEST", "UMBRA", "VANGUARD", "WARDEN", "XENITH", "YONDER", "ZEPHYR", "AURORA",
+              "BULWARK", "CINDER", "DYNAMO", "ECLIPSE", "FRONTIER", "GRANITE", "HALCYON", "IRONCLAD", "JUGGERNAUT"]
+PASSIVES = ["EXTRA PADDING", "MED-KIT", "SCOUT", "SERVO-ASSISTED", "FORTIFIED", "ENGINEERING KIT"]
+
+
+class SimMenu:
+    """One item menu: its category tabs (or a single flat grid), the items in it and the cursor."""
+    def __init__(self, db_key, db, categories=None):
+        self.db_key = db_key
+        self.categorized = bool(categories)
+        self.tabs = list(categories) if categories else [None]
+        self.cells = {tab: {} for tab in self.tabs}
+        self.details = db
+        for name, details in db.items():
+            tab = details.get("cat") if self.categorized else None
+            if tab in self.cells:
+                self.cells[tab][tuple(details["pos"])] = name
+
+        # Row lengths per tab, from the furthest item in each row
+        self.row_lengths = {}
+        for tab, cells in self.cells.items():
+            lengths = [0] * (max((row for row, _ in cells), default=-1) + 1)
+            for row, col in cells:
+                lengths[row] = max(lengths[row], col + 1)
+            self.row_lengths[tab] = lengths
+
+        self.tab_idx = 0
+        self.row = 0
+        self.col = 0
+
+    @property
+    def tab(self):
+        return self.tabs[self.tab_idx]
+
+    def hovered(self):
+        return self.cells[self.tab].get((self.row, self.col), "")
+
+    def hover(self, name):
+        details = self.details.get(name)
+        if details is None:
+            return
+        if self.categorized and details.get("cat") in self.tabs:
+            self.tab_idx = self.tabs.index(details["cat"])
+        self.row, self.col = details["pos"]
+
+    def _clamp_column(self):
+        lengths = self.row_lengths[self.tab]
+        length = lengths[self.row] if self.row < len(lengths) else 0
+        self.col = min(self.col, max(0, length - 1))
+
+    def switch_tab(self, step=1):
+        # Tab switching resets the row and keeps the column (nav_planner.TAB_SWITCH_RULE)
+        self.tab_idx = (self.tab_idx + step) % len(self.tabs)
+        self.row = 0
+        self._clamp_column()
+
+    def move(self, direction):
+        lengths = self.row_lengths[self.tab]
+        if not lengths:
+            return
+        length = lengths[self.row]
+
+        if direction == "RIGHT" and length:
+            self.col = (self.col + 1) % length
+        elif direction == "LEFT" and length:
+            self.col = (self.col - 1) % length
+        elif direction == "DOWN":
+            if self.row + 1 < len(lengths):
+                self.row += 1
+            elif self.categorized:
+                # Scrolling past the last row opens the next tab
+                self.switch_tab(1)
+                return
+            else:
+                self.row = 0
+            self._clamp_column()
+        elif direction == "UP":
+            if self.row > 0:
+                self.row -= 1
+            elif self.categorized:
+                self.switch_tab(-1)
+                self.row = max(0, len(self.row_lengths[self.tab]) - 1)
+            else:
+                self.row = len(lengths) - 1
+            self._clamp_column()
+
+
+class GameSimulator:
+    """
+    Headless stand-in for the game's loadout screen, for offline end-to-end runs of apply_loadout
+    and the mappers. It renders the menus of the given item databases as image frames, reacts to
+    the same keys the game does and plugs in through the capture backend, key input and recognizer
+    extension points (see install()).
+    dbs: {db_key: database}, as in item_databases/ (see make_databases())
+    latency: seconds between a key press and the screen showing its result
+    greyed_boosters: boosters that can't be picked, as if another player already brought them
+    """
+    def __init__(self, dbs, latency=0.0, greyed_boosters=(), equipped=None):
+        self.dbs = dbs
+        self.latency = latency
+        self.greyed_boosters = set(greyed_boosters)
+        self.lobby_ready = True
+
+        # What the player has equipped: the first item of every menu unless told otherwise
+        self.equipped = {db_key: next(iter(db), None) for db_key, db in dbs.items()}
+        self.equipped.update(equipped or {})
+        self.stratagems = [None] * STRATAGEM_SLOTS
+        self.strat_slot = 0
+
+        # Loadout screen state
+        self.tab = "required"
+        self.slot = [0, 0]
+        self.menu = None
+        self._menus = {}
+
+        self.actions = {key: action for action, key in SIM_CONTROLS.items()}
+        self.actions["escape"] = "ESCAPE"
+        self.key_log = []
+
+        self._lock = threading.RLock()
+        self._pending = deque()  # (visible_at, display) waiting out the render latency
+        self._display = self.display()
+        self._frames = {}  # display -> rendered screen
+        self._boxes = {}  # (box, text, style) -> rendered text box
+        self._texts = {}  # frame hash of a rendered text box -> its text
+        self._previous = None
+
+    # --- Game logic ---
+
+    def open_menu(self, db_key, at_start=False):
+        """
+        Opens an item menu right away, e.g. before a mapping run. It opens on the equipped item,
+        or on the first cell of the first tab with at_start (where the mapper expects to start).
+        """
+        with self._lock:
+            self._open_menu(db_key, at_start)
+            self._show(immediately=True)
+
+    def _open_menu(self, db_key, at_start=False):
+        if db_key not in self._menus:
+            self._menus[db_key] = SimMenu(db_key, self.dbs.get(db_key, {}), SIM_CATEGORIES.get(db_key))
+        self.menu = self._menus[db_key]
+        self.menu.tab_idx = self.menu.row = self.menu.col = 0
+        if not at_start and db_key != "stratagems" and self.equipped.get(db_key):
+            self.menu.hover(self.equipped[db_key])
+
+    def press_key(self, key):
+        with self._lock:
+            self.key_log.append(key)
+            action = self.actions.get(key)
+            if action:
+                if self.menu is not None:
+                    self._menu_action(action)
+                else:
+                    self._screen_action(action)
+            self._show()
+
+    def _menu_action(self, action):
+        if action in ("UP", "DOWN", "LEFT", "RIGHT"):
+            self.menu.move(action)
+        elif action == "MENU TAB RIGHT" and self.menu.categorized:
+            self.menu.switch_tab(1)
+        elif action == "ENTER MENU":
+            self._select(self.menu.hovered())
+        elif action == "ESCAPE":
+            self.menu = None
+
+    def _select(self, name):
+        db_key = self.menu.db_key
+        if not name or (db_key == "booster" and name in self.greyed_boosters):
+            return
+
+        if db_key == "stratagems":
+            # Picking a stratagem moves on to the next slot; the menu closes after the last one
+            self.stratagems[self.strat_slot] = name
+            self.strat_slot += 1
+            if self.strat_slot >= STRATAGEM_SLOTS:
+                self.strat_slot = 0
+                self.menu = None
+            return
+
+        self.equipped[db_key] = name
+        # Equipment menus stay open until escape
+        if db_key == "booster":
+            self.menu = None
+
+    def _screen_action(self, action):
+        if action == "SWITCH":
+            self.tab = "equipment" if self.tab == "required" else "required"
+            self.slot = [0, 0]
+        elif action == "ENTER MENU":
+            self._open_menu(self.slot_key())
+        elif action in ("UP", "DOWN", "LEFT", "RIGHT"):
+            row, col = self.slot
+            row += {"UP": -1, "DOWN": 1}.get(action, 0)
+            col += {"LEFT": -1, "RIGHT": 1}.get(action, 0)
+            grid = [REQUIRED_SLOTS] if self.tab == "required" else EQUIPMENT_SLOTS
+            self.slot = [min(max(row, 0), len(grid) - 1), min(max(col, 0), len(grid[0]) - 1)]
+
+    def slot_key(self):
+        """The database of the loadout slot the cursor is on."""
+        grid = [REQUIRED_SLOTS] if self.tab == "required" else EQUIPMENT_SLOTS
+        return grid[self.slot[0]][self.slot[1]]
+
+    # --- Rendering ---
+
+    def display(self):
+        """What the screen shows right now, as ((box, text, style), ...)."""
+        shown = []
+        if self.lobby_ready:
+            shown.append(("ready", "READY UP", "highlight"))
+        if self.menu is not None:
+            name = self.menu.hovered()
+            if self.menu.categorized:
+                shown.append(("cat", self.menu.tab, "normal"))
+            greyed = self.menu.db_key == "booster" and name in self.greyed_boosters
+            shown.append(("item", name, "greyed" if greyed else "normal"))
+            passive = self.menu.details.get(name, {}).get("passive")
+            if passive:
+                shown.append(("perk", passive, "normal"))
+        return tuple(shown)
+
+    def _show(self, immediately=False):
+        """Queues the current state for the screen, after the render latency."""
+        if immediately or self.latency <= 0:
+            self._pending.clear()
+            self._display = self.display()
+        else:
+            self._pending.append((time.perf_counter() + self.latency, self.display()))
+
+    def visible_display(self):
+        with self._lock:
+            now = time.perf_counter()
+            while self._pending and self._pending[0][0] <= now:
+                self._display = self._pending.popleft()[1]
+            return self._display
+
+    def _text_box(self, box, text, style):
+        """Renders one text box and teaches the simulated recognizer what it says."""
+        cached = self._boxes.get((box, text, style))
+        if cached is not None:
+            return cached
+
+        _, _, width, height = SIM_BOXES[box]
+        image = np.full((height, width, 3), BACKGROUND, dtype=np.uint8)
+        if text:
+            cv2.putText(image, text, (6, height - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, TEXT_COLOURS[style], 1,
+                        cv2.LINE_AA)
+
+        # Register the box the way every ROI looking at it will see it after preprocessing
+        for roi_key, roi_box in SIM_ROIS.items():
+            if roi_box == box:
+                self._texts[frame_hash(text_signature(preprocess(image, roi_key)))] = text
+        self._boxes[(box, text, style)] = image
+        return image
+
+    def render(self, display):
+        frame = self._frames.get(display)
+        if frame is None:
+            width, height = SCREEN_SIZE
+            frame = np.full((height, width, 3), BACKGROUND, dtype=np.uint8)
+            shown = {entry[0]: entry for entry in display}
+            for box, (left, top, box_w, box_h) in SIM_BOXES.items():
+                _, text, style = shown.get(box, (box, "", "normal"))
+                frame[top:top + box_h, left:left + box_w] = self._text_box(box, text, style)
+
+            if len(self._frames) > 256:
+                self._frames.clear()
+            self._frames[display] = frame
+        return frame
+
+    def grab(self, roi_coords):
+        with self._lock:
+            frame = self.render(self.visible_display())
+        left, top, width, height = roi_coords
+        if left < 0 or top < 0 or left + width > SCREEN_SIZE[0] or top + height > SCREEN_SIZE[1]:
+            raise ValueError(f"ROI {roi_coords} is outside the simulated screen.")
+        return frame[top:top + height, left:left + width]
+
+    def read_text(self, frame):
+        """What a perfect OCR would read from a (preprocessed) crop of a rendered text box."""
+        return self._texts.get(frame_hash(text_signature(frame)), "")
+
+    # --- Wiring ---
+
+    def install(self):
+        """
+        Routes screen capture, key input and OCR to the simulator and lays its ROI layout and key
+        bindings over settings.json, in memory only. Create the LoadoutManager after this.
+        """
+        self._previous = {
+            "backend": set_backend(SimulatorBackend(self)),
+            "input": key_input.set_input(SimulatedInput(self)),
+            "recognizers": list(recognizer_chain.recognizers),
+            "overrides": ConfigManager.overrides,
+            "persist": ConfigManager.persist
+        }
+        set_recognizers([SimulatedRecognizer(self)])
+        ConfigManager.overrides = {
+            "rois": {roi_key: SIM_BOXES[box] for roi_key, box in SIM_ROIS.items()},
+            "controls": dict(SIM_CONTROLS)
+        }
+        ConfigManager.persist = False
+
+        # Simulated frames must not end up in the real caches
+        frame_cache.clear()
+        disk_cache.detach()
+        return self
+
+    def uninstall(self):
+        """Restores the previous capture, input, recognizers and settings. The disk cache stays off."""
+        if self._previous is None:
+            return
+        set_backend(self._previous["backend"])
+        key_input.set_input(self._previous["input"])
+        set_recognizers(self._previous["recognizers"])
+        ConfigManager.overrides = self._previous["overrides"]
+        ConfigManager.persist = self._previous["persist"]
+        frame_cache.clear()
+        self._previous = None
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc_info):
+        self.uninstall()
+
+
+class SimulatorBackend(CaptureBackend):
+    name = "simulator"
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+
+    def grab(self, roi_coords):
+        return self.simulator.grab(roi_coords)
+
+
+class SimulatedInput(KeyInput):
+    """The game reacts when a key goes down."""
+    name = "simulator"
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+
+    def key_down(self, key):
+        self.simulator.press_key(key)
+
+    def key_up(self, key):
+        pass
+
+    def press(self, key):
+        self.simulator.press_key(key)
+
+
+class SimulatedRecognizer(Recognizer):
+    """Reads the simulator's text boxes back exactly, so runs don't depend on an OCR model."""
+    name = "simulated"
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+
+    def recognize(self, frame, roi_key=None):
+        return self.simulator.read_text(frame)
+
+
+def loadout_items(loadout):
+    """The item names a loadout file refers to, per database."""
+    items = {
+        "stratagems": [loadout[f"stratagem_{num}"] for num in range(1, STRATAGEM_SLOTS + 1)],
+        "booster": list(loadout.get("boosters", [])),
+        # The passive in brackets isn't part of the armor's name
+        "armor": [loadout["armor"].split("(")[0].strip()]
+    }
+    for db_key in ("helmet", "cape", "primary", "secondary", "grenade"):
+        items[db_key] = [loadout[db_key]]
+    return items
+
+
+def make_databases(items_per_db=40, columns=4, seed=0, include=None):
+    """
+    Builds a synthetic set of item databases, laid out the way the mapper records them:
+    items are dealt over the category tabs and fill each tab row by row.
+    include: {db_key: [names]} that must be in the catalog (e.g. loadout_items(loadout))
+    """
+    rng = random.Random(seed)
+    dbs = {}
+    for db_key in DB_FILES:
+        names = list(dict.fromkeys((include or {}).get(db_key, [])))
+        used = set(names)
+        pairs = [(a, b) for a in NAME_WORDS for b in NAME_WORDS if a != b]
+        rng.shuffle(pairs)
+        while len(names) < items_per_db:
+            first, second = pairs.pop() if pairs else (rng.choice(NAME_WORDS), rng.choice(NAME_WORDS))
+            name = f"{NAME_CODES[db_key]}-{rng.randint(2, 999)} {first} {second}"
+            if name not in used:
+                used.add(name)
+                names.append(name)
+
+        # Spread the included items over the menu instead of piling them up at the start
+        rng.shuffle(names)
+        tabs = SIM_CATEGORIES.get(db_key) or [None]
+        counts = {tab: 0 for tab in tabs}
+        db = {}
+        for idx, name in enumerate(names):
+            tab = tabs[idx % len(tabs)]
+            entry = {"pos": [counts[tab] // columns, counts[tab] % columns]}
+            counts[tab] += 1
+            if tab:
+                entry["cat"] = tab
+            if db_key == "armor":
+                entry["passive"] = rng.choice(PASSIVES)
+            db[name] = entry
+        dbs[db_key] = db
+    return dbs
+
+
+def write_databases(dbs, folder):
+    """Saves databases under their item_databases/ file names."""
+    os.makedirs(folder, exist_ok=True)
+    for db_key, db in dbs.items():
+        with open(os.path.join(folder, DB_FILES[db_key]), "w") as f:
+            json.dump(db, f, indent=4)
+
+
+if __name__ == "__main__":
+    # Offline end-to-end run: python game_simulator.py [loadout.json] [latency]
+    import tempfile
+    from loadout_selection import LoadoutManager, apply_loadout
+
+    sys.stdout = sys.__stdout__
+    loadout_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join("loadouts", "gl_medic.json")
+    with open(loadout_path, "r") as f:
+        demo_loadout = json.load(f)
+
+    demo_dbs = make_databases(include=loadout_items(demo_loadout))
+    with tempfile.TemporaryDirectory() as demo_folder, \
+            GameSimulator(demo_dbs, latency=float(sys.argv[2]) if len(sys.argv) > 2 else 0.03) as sim:
+        write_databases(demo_dbs, demo_folder)
+        manager = LoadoutManager(None, db_folder=demo_folder)
+        start = time.perf_counter()
+        apply_loadout(manager, demo_loadout)
+        print(f"Applied {demo_loadout['name']} in {time.perf_counter() - start:.2f}s "
+              f"({len(sim.key_log)} key presses). Degraded: {sorted(manager.degraded_dbs) or 'none'}")
+        print(f"Stratagems: {sim.stratagems}")
+        print(f"Equipped: {sim.equipped}")
@@ -4,11 +4,15 @@ import sys
 import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
+import bisect
 import json
 import os
 import time
-from thefuzz import fuzz
+from item_store import search_items
+from loadout_library import LoadoutLibrary
+from loadout_watcher import LoadoutWatcher
 from loadout_selection import wait_for_lobby, apply_loadout, LoadoutManager
+from ocr_reader import reader_provider
 import logging
 
 
@@ -19,6 +23,9 @@ class LoadoutGUI:
     overlay_tool: ROIOverlay
 
     def __init__(self):
+        # Start loading the OCR engine right away so it overlaps with building the window
+        reader_provider.start_warmup()
+
         # --- Root Configuration ---
         self.root = tk.Tk()
         self.root.title("SEAF Loadout Manager")
@@ -34,12 +41,16 @@ class LoadoutGUI:
         self.overlay_tool = ROIOverlay(self.root)
 
         self.loadout_map = None
+        self.listed_files = []  # Loadout file name of each loadout_listbox row
         self.current_loadout_data = None
         self.manager = LoadoutManager(self.overlay_tool)
         self.is_watching = False
         self.button_pressed = None
 
         validate_loadout_files(os.path.join(self.manager.config.basepath, "loadouts"))
+        # Only the loadout files that changed since the last start get parsed
+        self.library = LoadoutLibrary(os.path.join(self.manager.config.basepath, "loadouts"))
+        self.library.refresh()
 
         # --- GLOBAL STYLE REFINEMENT ---
         style = ttk.Style()
@@ -90,7 +101,7 @@ class LoadoutGUI:
         self.faction_filter = ttk.Combobox(filter_frame, values=factions, state="readonly", font=("Courier", 10, "bold"))
         self.faction_filter.set("ALL")
         self.faction_filter.pack(side="right", fill="x", expand=True, padx=5)
-        self.faction_filter.bind("<<ComboboxSelected>>", self.refresh_loadouts)
+        self.faction_filter.bind("<<ComboboxSelected>>", self.show_loadouts)
 
         self.list_container = tk.Frame(self.left_frame, bg="#1a1a1a")
         self.list_container.pack(fill="both", expand=True)
@@ -182,6 +193,7 @@ class LoadoutGUI:
 
         self.status_var = tk.StringVar(value="STATUS: SYSTEM IDLE")
         tk.Label(self.root, textvariable=self.status_var, bg="#1a1a1a", fg="white", font=("Courier", 11)).pack(pady=5)
+        self.poll_ocr_status()
 
         self.ctrl_frame = tk.Frame(self.root, bg="#1a1a1a")
         self.ctrl_frame.pack(pady=20)
@@ -200,6 +212,10 @@ class LoadoutGUI:
         self.stop_btn.pack(side="left")
 
         # Final Setup
+        # Started before the first listing, so nothing saved in between is missed
+        self.loadout_watcher = LoadoutWatcher(
+            self.library.folder, lambda events: self.root.after(0, self.apply_loadout_events, events),
+            self.manager.config.get_control("LOADOUT POLL INTERVAL", 2.0)).start()
         self.refresh_loadouts()
         self.loadout_listbox.bind("<<ListboxSelect>>", self.on_select)
         self.root.mainloop()
@@ -207,9 +223,25 @@ class LoadoutGUI:
     def on_closing(self):
         # This ensures the logic thread and the app die together
         logging.info("--- APPLICATION CLOSING ---")
+        self.loadout_watcher.stop()
         self.root.destroy()
         os._exit(0)
 
+    def poll_ocr_status(self):
+        """Reports the OCR warmup in the footer until the reader has finished loading."""
+        idle_states = ("STATUS: SYSTEM IDLE", "STATUS: OCR WARMING UP...")
+        status = reader_provider.status
+
+        if status == "WARMING UP":
+            # Only take over the footer when nothing more important is being shown
+            if self.status_var.get() in idle_states:
+                self.status_var.set("STATUS: OCR WARMING UP...")
+            self.root.after(250, self.poll_ocr_status)
+        elif status == "FAILED":
+            self.status_var.set("WARNING: OCR ENGINE FAILED TO LOAD - SEE LOG")
+        elif self.status_var.get() in idle_states:
+            self.status_var.set("STATUS: SYSTEM IDLE")
+
     def update_gui_progress(self, value):
         self.progress_var.set(value)
         self.root.update_idletasks()  # Forces the GUI to refresh
@@ -232,6 +264,12 @@ class LoadoutGUI:
 
     # --- Mapping Panel Methods ---
     def create_mapping_buttons(self):
+        # Incremental: after a patch, only re-map the rows that no longer match the database
+        self.incremental_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.right_frame, text="CHANGED ROWS ONLY", variable=self.incremental_var,
+                       bg="#1a1a1a", fg="white", selectcolor="#333333", activebackground="#1a1a1a",
+                       activeforeground="#ffe81f", font=("Courier", 8, "bold")).pack(pady=4, padx=10)
+
         for db_key in self.db_configs.keys():
             btn = tk.Button(self.right_frame, text=f"MAP {db_key.upper()}",
                             command=lambda k=db_key: self.confirm_mapping(k),
@@ -265,41 +303,76 @@ class LoadoutGUI:
         if messagebox.askokcancel("Maintenance", instructions):
             focus_hd2_win() #Alt tab back to the game
             self.status_var.set(f"STATUS: CALIBRATING {db_key.upper()}...")
-            threading.Thread(target=self.run_mapping_thread, args=(db_key,), daemon=True).start()
+            threading.Thread(target=self.run_mapping_thread, args=(db_key, self.incremental_var.get()),
+                             daemon=True).start()
 
-    def run_mapping_thread(self, db_key):
+    def run_mapping_thread(self, db_key, incremental=False):
         # This calls the mapping logic you wrote in your Manager
-        self.manager.degraded_dbs.discard(db_key) if self.manager.run_mapper_by_key(db_key) else None
+        self.manager.degraded_dbs.discard(db_key) if self.manager.run_mapper_by_key(db_key, incremental) else None
         self.root.after(0, self.refresh_db_button_colors, ())
         self.root.after(0, lambda *args: self.status_var.set("STATUS: CALIBRATION COMPLETE"), ())
 
     # --- Loadout Logic Methods ---
     def refresh_loadouts(self, event=None):
+        """Re-indexes the loadout files that changed, then lists the library."""
+        self.library.refresh()
+        self.show_loadouts()
+
+    def show_loadouts(self, event=None):
         """Filters the loadout_listbox based on dynamically discovered faction tags."""
         self.faction_filter['values'] = self.get_unique_factions()
         selected_filter = self.faction_filter.get()
         self.loadout_listbox.delete(0, tk.END)
         self.loadout_map = {}  # Clear the mapping
-
-        loadout_folder = os.path.join(self.manager.config.basepath, "loadouts")
-        for filename in os.listdir(loadout_folder):
-            if filename.endswith(".json"):
-                path = os.path.join(loadout_folder, filename)
-                try:
-                    with open(path, 'r') as f:
-                        data = json.load(f)
-
-                    # 1. Get the 'Friendly Name' from JSON, fallback to filename
-                    display_name = data.get("name").upper()
-                    item_factions = [tag.upper() for tag in data.get("factions", [])]
-
-                    # 2. Filtering Logic
-                    if selected_filter == "ALL" or selected_filter in item_factions:
-                        self.loadout_listbox.insert(tk.END, display_name)
-                        # Store the path using the display file_path as the key
-                        self.loadout_map[display_name] = path
-                except Exception as e:
-                    print(f"Error loading {filename}: {e}")
+        self.listed_files = []
+
+        for display_name, path in self.library.listing(selected_filter):
+            self.loadout_listbox.insert(tk.END, display_name)
+            self.listed_files.append(os.path.basename(path))
+            # Store the path using the display file_path as the key
+            self.loadout_map[display_name] = path
+
+    def apply_loadout_events(self, events):
+        """Runs on the Tk thread: re-indexes the files the loadout watcher reported and patches their rows."""
+        changed = False
+        for event, filename in events:
+            # The library checks the file itself, so events we already handled are no-ops
+            if self.library.update_file(filename):
+                print(f"Loadout {event}: {filename}")
+                self.patch_loadout_row(filename)
+                changed = True
+
+        if changed:
+            self.library.save()
+            self.faction_filter['values'] = self.get_unique_factions()
+
+    def patch_loadout_row(self, filename):
+        """Removes, re-inserts or adds the listbox row of one loadout file, keeping the rest as is."""
+        selection = self.loadout_listbox.curselection()
+        was_selected = bool(selection) and self.listed_files[selection[0]] == filename
+        path = self.library.path(filename)
+
+        if filename in self.listed_files:
+            row = self.listed_files.index(filename)
+            old_name = self.loadout_listbox.get(row)
+            self.loadout_listbox.delete(row)
+            del self.listed_files[row]
+            if self.loadout_map.get(old_name) == path:
+                del self.loadout_map[old_name]
+
+        if not self.library.matches(filename, self.faction_filter.get()):
+            return
+        display_name = self.library.entries[filename]["name"]
+        row = bisect.bisect(self.listed_files, filename)
+        self.loadout_listbox.insert(row, display_name)
+        self.listed_files.insert(row, filename)
+        self.loadout_map[display_name] = path
+
+        if was_selected:
+            self.loadout_listbox.selection_set(row)
+            # Don't reset an armed deployment over an edit; it keeps the data it was armed with
+            if not self.is_watching:
+                self.update_preview(path)
 
     def on_select(self, *args):
         self.reset_ui()
@@ -444,27 +517,8 @@ class LoadoutGUI:
         self.manager.required_only = False
 
     def get_unique_factions(self):
-        """Scans all JSON files to find every unique faction tag."""
-        unique_factions = set()  # Use a set to prevent duplicates
-        loadout_folder = os.path.join(self.manager.config.basepath, "loadouts")
-
-        if not os.path.exists(loadout_folder):
-            return ["ALL"]
-
-        for filename in os.listdir(loadout_folder):
-            if filename.endswith(".json"):
-                try:
-                    with open(os.path.join(loadout_folder, filename), 'r') as f:
-                        data = json.load(f)
-                        factions = data.get("factions", [])
-                        if isinstance(factions, list):
-                            for f_tag in factions:
-                                unique_factions.add(f_tag.strip().upper())
-                except Exception as e:
-                    print(f"Error reading {filename} for factions: {e}")
-
-        # Return "ALL" followed by the sorted unique tags
-        return ["ALL"] + sorted(list(unique_factions))
+        """Every unique faction tag in the loadout library."""
+        return self.library.factions()
 
     def open_loadout_creator(self, edit_data=None):
         creator = tk.Toplevel(self.root)
@@ -544,7 +598,7 @@ class LoadoutGUI:
 
         # --- INNER LOGIC FUNCTIONS ---
         def update_search(event=None):
-            query = search_entry.get().upper()
+            query = search_entry.get()
             db_key = cat_var.get()
             results_list.delete(0, tk.END)
 
@@ -552,35 +606,7 @@ class LoadoutGUI:
             search_db = "stratagems" if "stratagem_" in db_key else db_key
 
             if search_db in self.manager.dbs:
-                db_content = self.manager.dbs[search_db]
-                matches = []
-
-                for item_name, details in db_content.items():
-                    # Default text for display
-                    display_text = item_name
-                    search_haystack = item_name.upper()
-
-                    # --- ARMOR SPECIAL HANDLING ---
-                    # If it's armor, append the metadata for searching and display
-                    if search_db == "armor" and isinstance(details, dict):
-                        passive = details.get("passive", "UNKNOWN").upper()
-                        armor_type = details.get("cat", "").upper()  # e.g., Light, Medium, Heavy
-
-                        # Format: NAME (TYPE PASSIVE)
-                        display_text = f"{item_name} ({armor_type} {passive})"
-                        search_haystack = display_text.upper()
-
-                    # --- FUZZY MATCHING ---
-                    # We search against the full haystack (Name + Passive)
-                    score = fuzz.partial_ratio(query, search_haystack)
-
-                    if query == "" or score > 70:
-                        matches.append((display_text, score))
-
-                # Sort by highest score, then alphabetically
-                matches.sort(key=lambda x: (-x[1], x[0]))
-
-                for text, score in matches:
+                for text in search_items(self.manager.dbs[search_db], query, search_db):
                     results_list.insert(tk.END, text)
 
         def update_selection_display():
@@ -0,0 +1,280 @@
+"""
+Consolidated binary store for the item databases (item_databases/items.store).
+
+The mapper still writes the per-database JSON files, which stay the import/export format;
+ItemDatabaseStore packs them into this one file and on later starts memory-maps it instead of
+parsing eight JSON files. Layout (little-endian, every table 8-byte aligned):
+
+    header     magic, version, database count, string count, string/blob/directory offsets
+    directory  one SECTION per database: key, grid metadata, JSON stamp, table offsets
+    records    one fixed-width RECORD per item, in database order
+    grams      the trigram postings of the fuzzy match index (see fuzzy_index.MatchIndex)
+    strings    offset table and UTF-8 blob; every name, category, passive and trigram is stored once
+"""
+import json
+import mmap
+import os
+import sys
+from collections import defaultdict
+from collections.abc import Mapping
+
+import numpy as np
+
+from fuzzy_index import MatchIndex, ngrams, normalize_key
+from nav_planner import GridModel, grid_metadata_path, save_grid_metadata
+from utils import write_json_atomic
+
+PACK_FILE = "items.store"
+PACK_MAGIC = b"HDIS"
+# 2: grids carry the "block" column_overflow default (see nav_planner.load_grid_metadata)
+PACK_VERSION = 2
+NO_STRING = 0xFFFFFFFF
+
+HEADER = np.dtype([("magic", "S4"), ("version", "<u4"), ("db_count", "<u4"), ("string_count", "<u4"),
+                   ("strings", "<u8"), ("blob", "<u8"), ("directory", "<u8")])
+SECTION = np.dtype([("key", "<u4"), ("grid", "<u4"), ("mtime", "<i8"), ("size", "<i8"),
+                    ("records", "<u8"), ("record_count", "<u4"), ("gram_count", "<u4"),
+                    ("grams", "<u8"), ("postings", "<u8"), ("posting_count", "<u8")])
+RECORD = np.dtype([("name", "<u4"), ("norm", "<u4"), ("cat", "<u4"), ("passive", "<u4"), ("extra", "<u4"),
+                   ("row", "<u2"), ("col", "<u2"), ("gram_count", "<u4")])
+GRAM = np.dtype([("gram", "<u4"), ("count", "<u4"), ("start", "<u8")])
+
+# Item fields with their own record columns; anything else is kept as a JSON string
+RECORD_FIELDS = ("cat", "pos", "passive")
+
+
+class _StringTable:
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def intern(self, text):
+        if text is None:
+            return NO_STRING
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = self.ids[text] = len(self.strings)
+            self.strings.append(text)
+        return string_id
+
+
+def _pack_database(data, strings):
+    records = np.zeros(len(data), RECORD)
+    postings = defaultdict(list)
+    for idx, (name, details) in enumerate(data.items()):
+        clean_key = normalize_key(name)
+        key_grams = ngrams(clean_key)
+        extra = {field: value for field, value in details.items() if field not in RECORD_FIELDS}
+        row, col = details["pos"]
+        records[idx] = (strings.intern(name), strings.intern(clean_key), strings.intern(details.get("cat")),
+                        strings.intern(details.get("passive")),
+                        strings.intern(json.dumps(extra)) if extra else NO_STRING, row, col, len(key_grams))
+        for gram in key_grams:
+            postings[gram].append(idx)
+
+    grams = np.zeros(len(postings), GRAM)
+    flat = []
+    for gram_idx, (gram, indices) in enumerate(sorted(postings.items())):
+        grams[gram_idx] = (strings.intern(gram), len(indices), len(flat))
+        flat.extend(indices)
+    return records, grams, np.array(flat, dtype="<u4")
+
+
+def write_pack(path, databases):
+    """
+    Writes a store file.
+    databases: {db_key: (data, grids, stamp)} with grids as {category: GridModel} and stamp the
+    (mtime_ns, size) of the JSON file the data came from
+    """
+    strings = _StringTable()
+    directory = np.zeros(len(databases), SECTION)
+    tables = []
+    for section, (db_key, (data, grids, stamp)) in zip(directory, databases.items()):
+        section["key"] = strings.intern(db_key)
+        section["grid"] = strings.intern(json.dumps({category: model.to_dict() for category, model in grids.items()}))
+        section["mtime"], section["size"] = stamp
+        tables.append(_pack_database(data, strings))
+
+    encoded = [text.encode("utf-8") for text in strings.strings]
+    offsets = np.zeros(len(encoded) + 1, "<u8")
+    offsets[1:] = np.cumsum([len(text) for text in encoded])
+    blob = b"".join(encoded)
+
+    # Lay the tables out after the header and directory
+    chunks = []
+    position = HEADER.itemsize + directory.nbytes
+
+    def place(buffer):
+        nonlocal position
+        padding = -position % 8
+        chunks.append(b"\0" * padding + buffer)
+        position += padding
+        start = position
+        position += len(buffer)
+        return start
+
+    for section, (records, grams, postings) in zip(directory, tables):
+        section["records"], section["record_count"] = place(records.tobytes()), len(records)
+        section["grams"], section["gram_count"] = place(grams.tobytes()), len(grams)
+        section["postings"], section["posting_count"] = place(postings.tobytes()), len(postings)
+    strings_offset = place(offsets.tobytes())
+    blob_offset = place(blob)
+
+    header = np.array([(PACK_MAGIC, PACK_VERSION, len(databases), len(strings.strings),
+                        strings_offset, blob_offset, HEADER.itemsize)], HEADER)
+    with open(path, "wb") as f:
+        f.write(header.tobytes())
+        f.write(directory.tobytes())
+        for chunk in chunks:
+            f.write(chunk)
+
+
+class _Postings:
+    """MatchIndex postings ({trigram: key indices}) read from the pack one lookup at a time."""
+    def __init__(self, spans, postings):
+        self._spans = spans
+        self._postings = postings
+
+    def get(self, gram, default=()):
+        span = self._spans.get(gram)
+        if span is None:
+            return default
+        start, count = span
+        return self._postings[start:start + count].tolist()
+
+
+class ItemPack:
+    """A store file, memory-mapped read-only. Raises ValueError if it isn't one this version can read."""
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < HEADER.itemsize:
+            raise ValueError(f"{path} is truncated.")
+
+        header = np.frombuffer(self._mmap, HEADER, 1)[0]
+        if header["magic"] != PACK_MAGIC or header["version"] != PACK_VERSION:
+            raise ValueError(f"{path} is not a version {PACK_VERSION} item store.")
+
+        self._offsets = np.frombuffer(self._mmap, "<u8", int(header["string_count"]) + 1,
+                                      int(header["strings"])).tolist()
+        self._blob = int(header["blob"])
+        # Strings are decoded on first use, then shared by everything that refers to them
+        self._strings = [None] * int(header["string_count"])
+        directory = np.frombuffer(self._mmap, SECTION, int(header["db_count"]), int(header["directory"]))
+        self.sections = {self.string(int(section["key"])): section for section in directory}
+
+    def string(self, string_id):
+        if string_id == NO_STRING:
+            return None
+        text = self._strings[string_id]
+        if text is None:
+            start = self._blob + self._offsets[string_id]
+            end = self._blob + self._offsets[string_id + 1]
+            text = self._strings[string_id] = self._mmap[start:end].decode("utf-8")
+        return text
+
+    def strings(self, string_ids):
+        return [self.string(string_id) for string_id in string_ids.tolist()]
+
+    def _table(self, dtype, count, offset):
+        return np.frombuffer(self._mmap, dtype, int(count), int(offset)) if count else np.zeros(0, dtype)
+
+    def stamp(self, db_key):
+        """The (mtime_ns, size) of the JSON file the database was packed from."""
+        section = self.sections[db_key]
+        return int(section["mtime"]), int(section["size"])
+
+    def database(self, db_key):
+        section = self.sections[db_key]
+        return PackedDatabase(self, self._table(RECORD, section["record_count"], section["records"]))
+
+    def grids(self, db_key):
+        """{category: GridModel}, as load_grid_metadata returns them."""
+        data = json.loads(self.string(int(self.sections[db_key]["grid"])))
+        return {category: GridModel.from_dict(model) for category, model in data.items()}
+
+    def index(self, db_key):
+        """The database's MatchIndex, from the packed normalized keys and trigram postings."""
+        section = self.sections[db_key]
+        records = self._table(RECORD, section["record_count"], section["records"])
+        grams = self._table(GRAM, section["gram_count"], section["grams"])
+        postings = self._table("<u4", section["posting_count"], section["postings"])
+        spans = dict(zip(self.strings(grams["gram"]), zip(grams["start"].tolist(), grams["count"].tolist())))
+        return MatchIndex(self.strings(records["name"]),
+                          prebuilt=(self.strings(records["norm"]), records["gram_count"].tolist(),
+                                    _Postings(spans, postings)))
+
+
+class PackedDatabase(Mapping):
+    """
+    Read-only, dict-like view of one packed database: {item name: details}.
+    Details are built on access, so callers get a fresh dict they are free to modify.
+    """
+    def __init__(self, pack, records):
+        self._pack = pack
+        self._records = records
+        self._positions = None
+
+    def _lookup(self):
+        if self._positions is None:
+            self._positions = {name: idx for idx, name in enumerate(self._pack.strings(self._records["name"]))}
+        return self._positions
+
+    def details(self, idx):
+        name_id, _, cat_id, passive_id, extra_id, row, col, _ = self._records[idx].tolist()
+        details = {}
+        if cat_id != NO_STRING:
+            details["cat"] = self._pack.string(cat_id)
+        details["pos"] = [row, col]
+        if passive_id != NO_STRING:
+            details["passive"] = self._pack.string(passive_id)
+        if extra_id != NO_STRING:
+            details.update(json.loads(self._pack.string(extra_id)))
+        return details
+
+    def __getitem__(self, item_name):
+        return self.details(self._lookup()[item_name])
+
+    def __contains__(self, item_name):
+        return item_name in self._lookup()
+
+    def __iter__(self):
+        return iter(self._pack.strings(self._records["name"]))
+
+    def __len__(self):
+        return len(self._records)
+
+    def items(self):
+        return zip(self._pack.strings(self._records["name"]), map(self.details, range(len(self._records))))
+
+
+def export_json(pack_path, folder, files):
+    """
+    Writes the packed databases back out as the mapper's JSON files (and grid metadata).
+    files: {db_key: JSON file name}, as item_store.DB_FILES
+    """
+    pack = ItemPack(pack_path)
+    os.makedirs(folder, exist_ok=True)
+    for db_key in pack.sections:
+        if db_key not in files:
+            continue
+        db_path = os.path.join(folder, files[db_key])
+        grids = pack.grids(db_key)
+        if grids:
+            save_grid_metadata(db_path, grids)
+        elif os.path.exists(grid_metadata_path(db_path)):
+            os.remove(grid_metadata_path(db_path))
+        write_json_atomic(db_path, dict(pack.database(db_key).items()))
+        print(f"Exported {db_key} to {db_path}")
+
+
+if __name__ == "__main__":
+    # python item_pack.py export <store file> <folder>: the JSON files for sharing or hand edits
+    from item_store import DB_FILES
+
+    sys.stdout = sys.__stdout__
+    if len(sys.argv) != 4 or sys.argv[1] != "export":
+        print("Usage: python item_pack.py export <items.store> <folder>")
+        sys.exit(1)
+    export_json(sys.argv[2], sys.argv[3], DB_FILES)
@@ -0,0 +1,262 @@
+import glob
+import hashlib
+import json
+import os
+import time
+
+from thefuzz import fuzz
+
+from fuzzy_index import MatchIndex
+from item_pack import ItemPack, PackedDatabase, PACK_FILE, write_pack
+from nav_planner import load_grid_metadata
+
+# Manager key -> file in item_databases/
+DB_FILES = {
+    "primary": "primary_db.json",
+    "secondary": "secondary_db.json",
+    "armor": "armor_db.json",
+    "stratagems": "stratagem_db.json",
+    "booster": "booster_db.json",
+    "helmet": "helmet_db.json",
+    "grenade": "grenade_db.json",
+    "cape": "cape_db.json"
+}
+
+
+def _fingerprint(data):
+    """Stable hash of a database's contents."""
+    return hashlib.blake2b(json.dumps(data, sort_keys=True).encode("utf-8"), digest_size=16).digest()
+
+
+def validate_item_db(data):
+    """
+    Checks the structure the navigator relies on.
+    Returns (problems, warnings). Problems make the database unusable; warnings
+    (e.g. two OCR variants of the same item) are worth a re-map but navigation still works.
+    """
+    if not isinstance(data, dict):
+        return [f"Expected an object of items, found {type(data).__name__}."], []
+
+    problems = []
+    warnings = []
+    seen_positions = {}
+    for item_name, details in data.items():
+        pos = details.get("pos") if isinstance(details, dict) else None
+        if not (isinstance(pos, list) and len(pos) == 2 and all(isinstance(v, int) and v >= 0 for v in pos)):
+            problems.append(f"{item_name}: invalid position {pos}.")
+            continue
+
+        # Two items in the same cell means the mapping went wrong
+        cell = (details.get("cat", ""), pos[0], pos[1])
+        if cell in seen_positions:
+            warnings.append(f"{item_name} and {seen_positions[cell]} share position {pos}.")
+        else:
+            seen_positions[cell] = item_name
+    return problems, warnings
+
+
+def search_items(db, query, db_key=None, min_score=70):
+    """
+    The loadout creator's search: fuzzy partial match of the query against every item.
+    Armor is searched and shown as "NAME (TYPE PASSIVE)". Returns the display texts, best first.
+    """
+    query = query.upper()
+    matches = []
+
+    for item_name, details in db.items():
+        # Default text for display
+        display_text = item_name
+        search_haystack = item_name.upper()
+
+        # --- ARMOR SPECIAL HANDLING ---
+        # If it's armor, append the metadata for searching and display
+        if db_key == "armor" and isinstance(details, dict):
+            passive = details.get("passive", "UNKNOWN").upper()
+            armor_type = details.get("cat", "").upper()  # e.g., Light, Medium, Heavy
+
+            # Format: NAME (TYPE PASSIVE)
+            display_text = f"{item_name} ({armor_type} {passive})"
+            search_haystack = display_text.upper()
+
+        # --- FUZZY MATCHING ---
+        # We search against the full haystack (Name + Passive)
+        score = fuzz.partial_ratio(query, search_haystack)
+
+        if query == "" or score > min_score:
+            matches.append((display_text, score))
+
+    # Sort by highest score, then alphabetically
+    matches.sort(key=lambda x: (-x[1], x[0]))
+    return [text for text, _ in matches]
+
+
+class ItemDatabaseStore:
+    """
+    Loads the item databases once and reloads a single database only when its file changes
+    (by mtime and size). Also keeps a fingerprint of what was loaded so in-memory corruption
+    can be detected and reported instead of silently papered over.
+    Databases are served from the memory-mapped pack (see item_pack) while it matches the JSON
+    files; a JSON file that changed is parsed once and packed again.
+    """
+    def __init__(self, folder, files=None):
+        self.folder = folder
+        self.files = dict(files or DB_FILES)
+        self.dbs = {key: {} for key in self.files}
+        self.problems = {key: [] for key in self.files}
+        self.versions = {key: 0 for key in self.files}
+        self.grids = {key: {} for key in self.files}
+        self._stamps = {}
+        self._fingerprints = {}
+        self._indexes = {}
+        self.pack_path = os.path.join(folder, PACK_FILE)
+        self.pack = None
+
+    def path(self, db_key):
+        return os.path.join(self.folder, self.files[db_key])
+
+    def _stamp(self, db_key):
+        try:
+            stat = os.stat(self.path(db_key))
+            return stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    def refresh(self, db_keys=None):
+        """Reloads the databases whose files changed. Returns the keys that were reloaded."""
+        if not self._stamps:
+            self.open_pack()
+
+        changed = []
+        parsed = False
+        for db_key in db_keys or self.files:
+            stamp = self._stamp(db_key)
+            if db_key in self._stamps and self._stamps[db_key] == stamp:
+                continue
+            self._stamps[db_key] = stamp
+            if not self._load_packed(db_key, stamp):
+                self.reload(db_key)
+                parsed = parsed or stamp is not None
+            changed.append(db_key)
+
+        if parsed:
+            self.save_pack()
+        return changed
+
+    def open_pack(self):
+        """Maps the pack, finishing a replacement an earlier session couldn't (see save_pack)."""
+        for pending in sorted(glob.glob(f"{self.pack_path}.*.tmp"), key=os.path.getmtime)[::-1]:
+            try:
+                os.replace(pending, self.pack_path)
+                break
+            except OSError:
+                continue
+        for leftover in glob.glob(f"{self.pack_path}.*.tmp"):
+            try:
+                os.remove(leftover)
+            except OSError:
+                pass
+
+        try:
+            self.pack = ItemPack(self.pack_path)
+        except FileNotFoundError:
+            self.pack = None
+        except (OSError, ValueError) as e:
+            print(f"Database Warning: ignoring the item store ({e}). Loading the JSON files.")
+            self.pack = None
+
+    def _load_packed(self, db_key, stamp):
+        """Serves a database from the pack if it was packed from the current JSON file."""
+        if self.pack is None or stamp is None or db_key not in self.pack.sections or self.pack.stamp(db_key) != stamp:
+            return False
+
+        self.dbs[db_key] = self.pack.database(db_key)
+        self.grids[db_key] = self.pack.grids(db_key)
+        self.problems[db_key] = []
+        # Read-only: nothing in memory can drift from the file
+        self._fingerprints.pop(db_key, None)
+        self.versions[db_key] += 1
+        return True
+
+    def save_pack(self):
+        """Packs every healthy database into one file and serves them from it."""
+        packable = [db_key for db_key in self.files
+                    if self._stamps.get(db_key) and self.dbs[db_key] and not self.problems[db_key]]
+        databases = {db_key: (self.dbs[db_key], self.grids[db_key], self._stamps[db_key]) for db_key in packable}
+
+        tmp_path = f"{self.pack_path}.{time.time_ns()}.tmp"
+        try:
+            write_pack(tmp_path, databases)
+            try:
+                os.replace(tmp_path, self.pack_path)
+                path = self.pack_path
+            except PermissionError:
+                # Windows won't replace a file that is still mapped: serve the new pack from its
+                # temporary name until the next start moves it into place
+                path = tmp_path
+            self.pack = ItemPack(path)
+        except (OSError, ValueError) as e:
+            print(f"Database Warning: could not write the item store ({e}). Using the JSON files.")
+            return
+
+        for db_key in packable:
+            self.dbs[db_key] = self.pack.database(db_key)
+            self._fingerprints.pop(db_key, None)
+            self._indexes.pop(db_key, None)
+
+    def reload(self, db_key):
+        filename = self.path(db_key)
+        try:
+            with open(filename, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            print(f"Warning: {filename} not found.")
+            data = {}
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            # Keep serving the last good copy (e.g. the mapper is mid-write)
+            self.problems[db_key] = [f"Unreadable file: {e}"]
+            print(f"Database Error: {filename} could not be parsed ({e}). Keeping the previous copy.")
+            return
+
+        self.problems[db_key], warnings = validate_item_db(data)
+        for problem in self.problems[db_key]:
+            print(f"Database Error [{db_key}]: {problem}")
+        for warning in warnings:
+            print(f"Database Warning [{db_key}]: {warning}")
+
+        self.dbs[db_key] = data if isinstance(data, dict) else {}
+        # The mapper writes the grid shapes just before the database itself
+        self.grids[db_key] = load_grid_metadata(filename)
+        self._fingerprints[db_key] = _fingerprint(self.dbs[db_key])
+        self.versions[db_key] += 1
+
+    def verify(self, db_key):
+        """
+        Checks that the in-memory database still matches what was loaded from disk.
+        If something modified it, the change is reported and the file is reloaded.
+        Returns True if the data was intact.
+        """
+        if db_key not in self._fingerprints or _fingerprint(self.dbs[db_key]) == self._fingerprints[db_key]:
+            return True
+
+        print(f"Database Error [{db_key}]: in-memory data no longer matches the file. Reloading it.")
+        self.reload(db_key)
+        return False
+
+    def is_corrupt(self, db_key):
+        return bool(self.problems.get(db_key))
+
+    def grid(self, db_key, category=None):
+        """Returns the mapped GridModel for a tab ("" / None for flat grids), or None if not recorded."""
+        return self.grids.get(db_key, {}).get(category or "")
+
+    def index(self, db_key):
+        """Returns the fuzzy match index for a database, rebuilt only after it reloads."""
+        version = self.versions.get(db_key, 0)
+        cached = self._indexes.get(db_key)
+        if cached is None or cached[0] != version:
+            db = self.dbs.get(db_key, {})
+            # Packed databases come with their normalized keys and trigram postings
+            packed = self.pack is not None and isinstance(db, PackedDatabase) and db_key in self.pack.sections
+            cached = (version, self.pack.index(db_key) if packed else MatchIndex(db.keys()))
+            self._indexes[db_key] = cached
+        return cached[1]
@@ -0,0 +1,83 @@
+import threading
+
+from tracing import traced
+from utils import focus_hd2_win
+
+
+class KeyInput:
+    """Where key presses go. The game by default; the simulator swaps in its own."""
+    name = "base"
+
+    def key_down(self, key):
+        raise NotImplementedError
+
+    def key_up(self, key):
+        raise NotImplementedError
+
+    def press(self, key):
+        self.key_down(key)
+        self.key_up(key)
+
+    def focus_game(self):
+        pass
+
+
+class DirectInput(KeyInput):
+    """DirectInput scan codes through pydirectinput (Windows only, so it is imported on first use)."""
+    name = "pydirectinput"
+
+    def __init__(self):
+        import pydirectinput
+        self._pdi = pydirectinput
+
+    def key_down(self, key):
+        self._pdi.keyDown(key, _pause=False)
+
+    def key_up(self, key):
+        self._pdi.keyUp(key, _pause=False)
+
+    def press(self, key):
+        # Keeps pydirectinput's own pause after the press
+        self._pdi.press(key)
+
+    def focus_game(self):
+        focus_hd2_win()
+
+
+_input = None
+_input_lock = threading.Lock()
+
+
+def get_input():
+    """Returns the active key input, creating the DirectInput one on first use."""
+    global _input
+    with _input_lock:
+        if _input is None:
+            _input = DirectInput()
+        return _input
+
+
+def set_input(key_input):
+    """Replaces the active key input (e.g. with the game simulator's). Returns the old one."""
+    global _input
+    with _input_lock:
+        previous, _input = _input, key_input
+    return previous
+
+
+@traced("press", "input", ("key",))
+def press(key):
+    get_input().press(key)
+
+
+def key_down(key):
+    get_input().key_down(key)
+
+
+def key_up(key):
+    get_input().key_up(key)
+
+
+@traced("focus game", "input")
+def focus_game():
+    get_input().focus_game()
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+
+from environment_setup import get_base_path
+from utils import write_json_atomic
+
+LIBRARY_VERSION = 1
+
+
+def _content_hash(raw):
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+class LoadoutLibrary:
+    """
+    Index of the loadouts folder: display name, factions, mtime, size and content hash per file.
+    Kept in loadout_library.json next to the app, so a start (or a refresh) only parses the
+    files that changed since, and the GUI filters and lists from memory.
+    """
+    def __init__(self, folder, index_path=None):
+        self.folder = folder
+        self.index_path = index_path or os.path.join(get_base_path(), "loadout_library.json")
+        # filename -> {"name", "factions", "mtime", "size", "hash"} ("error" instead of name/factions if unreadable)
+        self.entries = {}
+        self._dirty = False
+        self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if data.get("version") == LIBRARY_VERSION and data.get("folder") == os.path.abspath(self.folder):
+            self.entries = data.get("entries", {})
+
+    def save(self):
+        try:
+            write_json_atomic(self.index_path, {
+                "version": LIBRARY_VERSION,
+                "folder": os.path.abspath(self.folder),
+                "entries": self.entries
+            })
+            self._dirty = False
+        except OSError as e:
+            print(f"Warning: could not save the loadout index ({e})")
+
+    def path(self, filename):
+        return os.path.join(self.folder, filename)
+
+    def update_file(self, filename):
+        """
+        Re-indexes one loadout file if it changed (or appeared).
+        Returns "added", "modified", "removed" or None if nothing changed.
+        """
+        path = self.path(filename)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return self.remove_file(filename)
+
+        entry = self.entries.get(filename)
+        if entry and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return None
+
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except OSError as e:
+            print(f"Error loading {filename}: {e}")
+            return None
+
+        content_hash = _content_hash(raw)
+        if entry and entry["hash"] == content_hash:
+            # Touched, not edited
+            entry["mtime"], entry["size"] = stat.st_mtime_ns, stat.st_size
+            self._dirty = True
+            return None
+
+        new_entry = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "hash": content_hash}
+        try:
+            data = json.loads(raw)
+            new_entry["name"] = data.get("name").upper()
+            factions = data.get("factions", [])
+            new_entry["factions"] = [tag.strip().upper() for tag in factions] if isinstance(factions, list) else []
+        except Exception as e:
+            print(f"Error loading {filename}: {e}")
+            new_entry["error"] = str(e)
+
+        self.entries[filename] = new_entry
+        self._dirty = True
+        return "modified" if entry else "added"
+
+    def remove_file(self, filename):
+        if self.entries.pop(filename, None) is None:
+            return None
+        self._dirty = True
+        return "removed"
+
+    def refresh(self):
+        """Brings the index up to date with the folder. Returns {filename: "added"/"modified"/"removed"}."""
+        try:
+            filenames = {name for name in os.listdir(self.folder) if name.endswith(".json")}
+        except FileNotFoundError:
+            filenames = set()
+
+        changes = {}
+        for filename in sorted(filenames | set(self.entries)):
+            change = self.update_file(filename) if filename in filenames else self.remove_file(filename)
+            if change:
+                changes[filename] = change
+
+        if self._dirty or not os.path.exists(self.index_path):
+            self.save()
+        return changes
+
+    def factions(self):
+        """"ALL" followed by every faction tag in the library, sorted."""
+        tags = {tag for entry in self.entries.values() for tag in entry.get("factions", [])}
+        return ["ALL"] + sorted(tags)
+
+    def matches(self, filename, faction="ALL"):
+        entry = self.entries.get(filename)
+        return bool(entry) and "error" not in entry and (faction == "ALL" or faction in entry["factions"])
+
+    def listing(self, faction="ALL"):
+        """[(display name, path)] of the readable loadouts with the faction tag, by file name."""
+        return [(self.entries[filename]["name"], self.path(filename))
+                for filename in sorted(self.entries) if self.matches(filename, faction)]
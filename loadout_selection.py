@@ -1,107 +1,115 @@
-import json
 import os
 import re
 from tkinter import messagebox
 
-import pydirectinput
+import numpy as np
 import time
 
 from thefuzz import fuzz
 
-from utils import ConfigManager, focus_hd2_win, STRAT_CATS, ARMOR_CATS, GRENADE_CATS, SECONDARY_CATS, PRIMARY_CATS, \
+from environment_setup import get_base_path
+from utils import ConfigManager, STRAT_CATS, ARMOR_CATS, GRENADE_CATS, SECONDARY_CATS, PRIMARY_CATS, \
     ConfigurationError
-from database_mapper import ocr_from_screen, map_categorized_grid, map_flat_grid
+import key_input
+from database_mapper import ocr_from_screen, ocr_many, map_categorized_grid, map_flat_grid
+from fuzzy_index import MatchIndex
+from item_store import ItemDatabaseStore
+from mapping_journal import MappingJournal
+from ocr_cache import frame_cache, disk_cache, signature_distance
+from nav_planner import GridModel, plan_moves
+from screen_capture import grab_rois
+from tracing import trace_run, traced
+from ui_sync import press_and_settle, press_sequence, wait_until_settled, roi_signature, is_valid_roi, \
+    CHANGE_THRESHOLD, STABLE_THRESHOLD
+
+# Slowest burst rate the navigator will back off to
+MIN_KEY_RATE = 5
+# Clean landings in a row before a lowered burst rate steps back up
+CLEAN_LANDINGS_TO_RECOVER = 3
 
 
 class LoadoutManager:
-    def __init__(self, overlay_tool):
+    def __init__(self, overlay_tool, db_folder=None):
         self.config = ConfigManager()
         self.overlay_tool = overlay_tool
+        self.degraded_dbs = set()
         # Load all your hard-earned JSON databases
+        self.store = ItemDatabaseStore(db_folder or os.path.join(self.config.basepath, "item_databases"))
+        self.dbs = self.store.dbs
         self.update_dbs()
-        self.degraded_dbs = set()
         # Track the 'virtual' cursor for each menu
         self.current_pos = [0, 0]
         self.last_loaded = None # Track last loadout and only apply everything if it's needed
+        # What we believe is equipped per slot (db_key -> DB key), so unchanged slots can be skipped
+        self.equipped = {}
+        self.diff_apply = self.config.get_control("DIFF APPLY", True)
+        self.last_selection_signature = None
+        # Presses per second for burst movement. Lowered for the session if landings are missed,
+        # raised back toward the configured rate after clean ones
+        self.max_key_rate = self.config.get_control("KEY RATE", 15)
+        self.key_rate = self.max_key_rate
+        self.clean_landings = 0
+        self.grid_models = {}
         self.required_only = False
 
     @staticmethod
+    @traced("fuzzy match", "match", ("target_name",))
     def _find_best_match(target_name, db_keys):
         """
         Enhanced search: Handles 'FRAG' -> 'G-6 FRAG' and
         strips row-col suffixes for cleaner comparison.
+        db_keys can be a prebuilt MatchIndex or any iterable of keys.
         """
-        best_match = None
-        highest_score = 0
-
-        target_clean = target_name.upper().strip()
-
-        for key in db_keys:
-            # 1. Clean the DB key (Remove the (row-col) suffix for the match check)
-            # This prevents '(0-0)' from lowering your fuzzy score
-            clean_key = key.split('(')[0].strip().upper()
-
-            # 2. Use WRatio for better partial/shorthand matching
-            # WRatio handles case-insensitivity and partials 'FRAG' in 'G-6 FRAG'
-            score = fuzz.WRatio(target_clean, clean_key)
-
-            # 3. Check for exact partial (If 'FRAG' is literally IN the key)
-            # We give a small boost if the shorthand is an exact substring
-            if target_clean in clean_key:
-                score += 5
-
-            if score > highest_score:
-                highest_score = score
-                best_match = key
+        index = db_keys if isinstance(db_keys, MatchIndex) else MatchIndex(db_keys)
+        return index.best_match(target_name)
 
-        return best_match, highest_score
+    def _match_index(self, db_key):
+        """Returns the match index for a database, rebuilt only when the database reloads."""
+        return self.store.index(db_key)
 
-    @staticmethod
-    def _load_json(filename):
-        try:
-            with open(filename, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            print(f"Warning: {filename} not found.")
-            return {}
-
-    def _align_category(self, target_cat, cat_roi, category_list):
-        """Navigates tabs and updates virtual row position."""
+    @traced("align category", "navigation", ("target_cat",))
+    def _align_category(self, target_cat, cat_roi, category_list, item_roi=None):
+        """
+        Navigates tabs and updates virtual row position.
+        item_roi: captured together with the tab name, and read once the tab is confirmed, so
+        the position read that follows is answered from the OCR cache.
+        """
         print(f"Aligning Category: Moving to {target_cat}...")
 
+        rois = {"cat": cat_roi, "item": item_roi} if item_roi else {"cat": cat_roi}
         for _ in range(len(category_list) * 2):
-            current_cat_text = ocr_from_screen(cat_roi, self.overlay_tool)
+            # One capture for both ROIs, but only the tab name is read until it matches
+            grab = grab_rois(list(rois.values()))
+            current_cat_text = ocr_many({"cat": cat_roi}, self.overlay_tool, grab=grab)["cat"]
 
             if fuzz.ratio(target_cat.upper(), current_cat_text.upper()) > 95:
                 print(f"√ Category Confirmed: {target_cat}")
+                if item_roi:
+                    ocr_many({"item": item_roi}, self.overlay_tool, grab=grab)
                 return True
             else:
                 print(f"Want {target_cat.upper()} but have {current_cat_text.upper()}.")
 
-            pydirectinput.press(self.config.get_control("MENU TAB RIGHT","c"))  # Tab Right
-            time.sleep(self.config.get_control("CAT SWITCH DELAY",0.4))
+            # Tab Right, then wait for the tab name to change and settle
+            press_and_settle(self.config.get_control("MENU TAB RIGHT","c"), cat_roi,
+                             self.config.get_control("CAT SWITCH DELAY",0.4))
 
-            # Tab switching resets Row to 0, but Column stays!
+            # Tab switching resets Row to 0, but Column stays! (nav_planner.TAB_SWITCH_RULE)
             self.current_pos[0] = 0
 
         return False
 
     def update_dbs(self):
-        self.dbs = {
-            "primary": self._load_json(os.path.join(self.config.basepath,"item_databases","primary_db.json")),
-            "secondary": self._load_json(os.path.join(self.config.basepath,"item_databases","secondary_db.json")),
-            "armor": self._load_json(os.path.join(self.config.basepath,"item_databases","armor_db.json")),
-            "stratagems": self._load_json(os.path.join(self.config.basepath,"item_databases","stratagem_db.json")),
-            "booster": self._load_json(os.path.join(self.config.basepath,"item_databases","booster_db.json")),
-            "helmet": self._load_json(os.path.join(self.config.basepath,"item_databases","helmet_db.json")),
-            "grenade": self._load_json(os.path.join(self.config.basepath,"item_databases","grenade_db.json")),
-            "cape": self._load_json(os.path.join(self.config.basepath,"item_databases","cape_db.json"))
-        }
-
-    def run_mapper_by_key(self,db_key):
+        """Reloads only the databases whose files changed since the last call."""
+        for db_key in self.store.refresh():
+            if self.store.is_corrupt(db_key):
+                self.degraded_dbs.add(db_key)
+
+    def run_mapper_by_key(self,db_key, incremental=False):
         """
         Dynamically fetches constants and routes to the mapper.
         Example: 'primary' -> fetches PRIMARY_ITEM_ROI, PRIMARY_CAT_ROI, etc.
+        incremental: only re-map the rows that changed since the existing database was mapped
         """
         # 1. Standardize the root file_path (e.g., 'primary' -> 'PRIMARY')
         # Note: If your constants use 'STRAT' instead of 'STRATAGEM',
@@ -126,23 +134,37 @@ class LoadoutManager:
         # 3. Handle the filename
         filename = f"{db_key}_db"
 
+        # An interrupted run of this mapper left a checkpoint: carry on from its last confirmed row
+        resume = MappingJournal.exists(os.path.join(self.store.folder, f"{filename}.json"))
+        if resume:
+            print(f"Found an interrupted {db_key} mapping. Resuming it.")
+
         # Check if we have categories; if not, call the standard grid mapper
-        if cats:
-            success = map_categorized_grid(filename, item_roi, cat_roi, cats, perk_roi, self.overlay_tool)
-        else:
-            success =  map_flat_grid(filename, item_roi, self.overlay_tool)
+        with trace_run(f"map_{db_key}"):
+            if cats:
+                success = map_categorized_grid(filename, item_roi, cat_roi, cats, perk_roi, self.overlay_tool,
+                                               db_folder=self.store.folder, resume=resume, incremental=incremental)
+            else:
+                success =  map_flat_grid(filename, item_roi, self.overlay_tool, db_folder=self.store.folder,
+                                         resume=resume, incremental=incremental)
         self.update_dbs()
         return success
 
+    @traced("navigate_to", "navigation", ("target_name", "db_key"))
     def navigate_to(self, target_name, db_key, item_roi, cat_roi=None, category_list=None, validation_score=75):
         retry_counter = 5
 
+        # Pick up a re-mapped database without re-parsing the others
+        self.update_dbs()
+
         while retry_counter > 0:
-            # Update DBs to prevent bug with data corruption (cause unknown)
-            self.update_dbs()
+            # Nothing should modify a database mid-apply. Report it if something did.
+            if not self.store.verify(db_key):
+                self.degraded_dbs.add(db_key)
             db = self.dbs.get(db_key)
             # 1. FIND TARGET DATA (Fuzzy Search)
-            best_match_key, match_score = self._find_best_match(target_name, list(db.keys()))
+            match_index = self._match_index(db_key)
+            best_match_key, match_score = self._find_best_match(target_name, match_index)
             if match_score < 80:
                 print(f"X No match for '{target_name}. Closest match: {best_match_key} at {match_score}'")
                 return False
@@ -158,7 +180,7 @@ class LoadoutManager:
 
             # 2. ALIGN CATEGORY (Same as before)
             if target_cat and category_list:
-                if not self._align_category(target_cat, cat_roi, category_list):
+                if not self._align_category(target_cat, cat_roi, category_list, item_roi):
                     retry_counter = retry_counter - 1
                     print(f"Unable to find the {target_cat} category. Retrying {retry_counter} more times...")
                     continue
@@ -168,10 +190,12 @@ class LoadoutManager:
             current_screen_text = ocr_from_screen(item_roi, self.overlay_tool)
 
             # Reverse lookup: Where are we?
-            current_match_key, current_score = self._find_best_match(current_screen_text, list(db.keys()))
+            current_match_key, current_score = self._find_best_match(current_screen_text, match_index)
 
             if current_score > 70:
-                self.current_pos = db[current_match_key]["pos"]
+                # Copy the position: _align_category edits current_pos in place, which used
+                # to rewrite the row of the matched item inside the database itself
+                self.current_pos = list(db[current_match_key]["pos"])
                 print(f"I am currently at {current_match_key} {self.current_pos}")
             else:
                 # FALLBACK: If we can't identify where we are, bail out
@@ -179,39 +203,121 @@ class LoadoutManager:
                 print(f"Verification failed. {current_match_key} not a valid location. Retry {retry_counter} more times.")
                 continue
 
-            # 4. CALCULATE DELTA & MOVE
-            delta_row = target_pos[0] - self.current_pos[0]
-            delta_col = target_pos[1] - self.current_pos[1]
-
-            print(f"Moving to {best_match_key} (Delta: {delta_row}R, {delta_col}C)")
-            self._move_cursor(delta_row, delta_col)
+            # 4. PLAN & MOVE
+            # The first attempt may take wrap-around shortcuts; retries walk the direct route
+            attempt = 5 - retry_counter
+            grid = self._grid_model(db_key, target_cat or None)
+            print(f"Moving to {best_match_key} (From {self.current_pos} to {target_pos})")
+            moved = self._move_cursor(self.current_pos, target_pos, item_roi, grid, allow_wrap=attempt == 0)
 
             # 5. FINAL VERIFICATION
-            time.sleep(self.config.get_control("OCR READ DELAY",0.3))
+            wait_until_settled(item_roi, self.config.get_control("OCR READ DELAY",0.3))
             ver_value = ocr_from_screen(item_roi, self.overlay_tool).upper()
             if fuzz.partial_ratio(best_match_key.upper(), ver_value) > validation_score:
-                pydirectinput.press(self.config.get_control("ENTER MENU"))
+                # Remember what the ROI showed so callers can wait for the menu to react
+                self.last_selection_signature = roi_signature(item_roi)
+                key_input.press(self.config.get_control("ENTER MENU"))
+                self._landed(True)
                 return True
 
             retry_counter = retry_counter - 1
+            # Only a cursor that ended up on another cell means keys were dropped. A target that
+            # is missing (a greyed out or taken booster) or a misread is no reason to slow down.
+            landed_key, landed_score = self._find_best_match(ver_value, match_index)
+            if not moved or (landed_score > 70 and list(db[landed_key]["pos"]) != list(target_pos)):
+                self._landed(False)
             print(f"Verification failed. Found {ver_value} instead. Retry {retry_counter} more times.")
         print("All verification failed. Terminating Search...")
         return False
 
 
-    def _move_cursor(self, dr, dc):
-        # Handle Rows
-        row_key = 's' if dr > 0 else 'w'
-        for _ in range(abs(dr)):
-            pydirectinput.press(row_key)
-            time.sleep(self.config.get_control("NAV DELAY",0.1))
+    def _resolve_target(self, target_name, db_key):
+        """Returns the DB key a loadout entry refers to, or None if nothing matches well enough."""
+        best_match_key, match_score = self._find_best_match(target_name, self._match_index(db_key))
+        return best_match_key if match_score >= 80 else None
+
+    def is_already_equipped(self, target_name, db_key, item_roi, validation_score=75):
+        """
+        Differential apply check, made right after opening a slot's menu (where the cursor
+        sits on the equipped item). Only if our model says the target is already equipped
+        does it spend a single OCR read to confirm it.
+        """
+        if not self.diff_apply:
+            return False
+
+        target_key = self._resolve_target(target_name, db_key)
+        if target_key is None or self.equipped.get(db_key) != target_key:
+            return False
+
+        current_text = ocr_from_screen(item_roi, self.overlay_tool).upper()
+        if fuzz.partial_ratio(target_key.upper(), current_text) > validation_score:
+            print(f"√ {target_key} already equipped. Skipping {db_key}.")
+            return True
 
-        # Handle Columns
-        col_key = 'd' if dc > 0 else 'a'
-        for _ in range(abs(dc)):
-            pydirectinput.press(col_key)
-            time.sleep(self.config.get_control("NAV DELAY",0.1))
+        print(f"Equipped model for {db_key} is stale (showing {current_text}). Navigating.")
+        self.equipped.pop(db_key, None)
+        return False
 
+    def record_equipped(self, target_name, db_key, success):
+        """Updates the equipped model after a slot was applied."""
+        target_key = self._resolve_target(target_name, db_key) if success else None
+        if target_key:
+            self.equipped[db_key] = target_key
+        else:
+            self.equipped.pop(db_key, None)
+
+    def _grid_model(self, db_key, category=None):
+        """
+        Grid shape of a menu (or one of its tabs). Uses the shape recorded by the mapper and
+        falls back to one derived from the item positions for databases mapped before that.
+        """
+        cache_key = (db_key, category, self.store.versions.get(db_key, 0))
+        if cache_key not in self.grid_models:
+            model = self.store.grid(db_key, category)
+            self.grid_models[cache_key] = model or GridModel.from_db(self.dbs.get(db_key, {}), category)
+        return self.grid_models[cache_key]
+
+    def _move_cursor(self, start, target, item_roi=None, grid=None, allow_wrap=True):
+        """
+        Sends the whole key sequence from start to target in one burst at KEY RATE presses
+        per second. Only the landing cell is checked afterward (by navigate_to).
+        Returns False if the ROI still shows the starting cell after a non-empty route.
+        """
+        keys = {direction: self.config.get_control(direction, default)
+                for direction, default in (("UP", "w"), ("DOWN", "s"), ("LEFT", "a"), ("RIGHT", "d"))}
+        sequence = plan_moves(start, target, grid, keys, allow_wrap)
+        if not sequence:
+            return True
+
+        baseline = roi_signature(item_roi) if is_valid_roi(item_roi) else None
+        press_sequence(sequence, self.key_rate)
+
+        # Upper bound scales with the route; normally returns a frame after the last press
+        nav_delay = self.config.get_control("NAV DELAY",0.1)
+        wait_until_settled(item_roi, nav_delay * min(len(sequence), 5), baseline=baseline)
+        # An ROI still showing the starting cell means the whole burst was dropped
+        return baseline is None or signature_distance(roi_signature(item_roi), baseline) > CHANGE_THRESHOLD
+
+    def _landed(self, clean):
+        """
+        Adjusts the burst key rate for this session: backs off after a missed landing and
+        steps back toward the configured KEY RATE after a few clean ones. Never saved.
+        """
+        if not clean:
+            self.clean_landings = 0
+            new_rate = max(MIN_KEY_RATE, round(self.key_rate * 0.7, 1))
+            if new_rate < self.key_rate:
+                print(f"Landing missed. Lowering KEY RATE from {self.key_rate} to {new_rate} presses/s.")
+                self.key_rate = new_rate
+            return
+
+        self.clean_landings += 1
+        if self.key_rate < self.max_key_rate and self.clean_landings >= CLEAN_LANDINGS_TO_RECOVER:
+            self.clean_landings = 0
+            self.key_rate = min(self.max_key_rate, round(self.key_rate / 0.7, 1))
+            print(f"Clean landings. Raising KEY RATE back to {self.key_rate} presses/s.")
+
+    @traced("apply_booster_priority", "navigation", ("db_key",))
     def apply_booster_priority(self, priority_list, db_key, item_roi):
         """
         Iterates through priorities. If navigate_to fails (Verification Mismatch),
@@ -228,7 +334,9 @@ class LoadoutManager:
                 db_key=db_key,
                 item_roi=item_roi
             )
-            time.sleep(self.config.get_control("OCR READ DELAY", 0.3))
+            # A successful pick closes the menu; a greyed-out one leaves it as it was
+            wait_until_settled(item_roi, self.config.get_control("OCR READ DELAY", 0.3),
+                               baseline=self.last_selection_signature if success else None)
 
             if success:
                 print(f"Navigation completed.")
@@ -256,32 +364,70 @@ class LoadoutManager:
             print(f"NOTICE: {booster_name} unavailable or navigation failed. Trying next...")
             # Since your navigate_to presses 'escape' on failure, we might need
             # to re-enter the booster menu here if your flow requires it.
-            # pydirectinput.press(self.config.get_control("ENTER MENU"))  # Re-open booster menu for next attempt
-            time.sleep(self.config.get_control("OCR READ DELAY",0.3))
+            # key_input.press(self.config.get_control("ENTER MENU"))  # Re-open booster menu for next attempt
+            wait_until_settled(item_roi, self.config.get_control("OCR READ DELAY",0.3))
 
         print("CRITICAL: All priority boosters are unavailable.")
         return False
 
+def _ready_signature_path():
+    return os.path.join(get_base_path(), "item_databases", "ready_signature.npy")
+
+def load_ready_signature():
+    """The READY_ROI signature saved the last time the lobby was detected, or None."""
+    try:
+        return np.load(_ready_signature_path(), allow_pickle=False)
+    except (OSError, ValueError):
+        return None
+
+def save_ready_signature(signature):
+    try:
+        os.makedirs(os.path.dirname(_ready_signature_path()), exist_ok=True)
+        np.save(_ready_signature_path(), signature)
+    except OSError as e:
+        print(f"Warning: could not save the ready signature ({e})")
+
 def wait_for_lobby(ready_roi, gui_instance):
     """
     ready_roi: The screen region to monitor.
     gui_instance: The LoadoutGUI object so we can check gui_instance.is_watching.
+    Every tick only takes a small signature of the ROI. OCR runs when the ROI changed
+    noticeably since the last read, or when a new frame looks like the last detected ready screen.
     """
+    if not is_valid_roi(ready_roi):
+        raise ConfigurationError(f"Invalid ROI: {ready_roi}.")
+
     print("Watcher: Monitoring for Ready-Up screen...")
+    poll_interval = ConfigManager().get_control("LOBBY POLL INTERVAL", 0.25)
+    ready_signature = load_ready_signature()
+    last_read = None  # Signature of the frame OCR last looked at
 
     while gui_instance.is_watching:
-        # Perform the actual screen check
-        text = ocr_from_screen(ready_roi, gui_instance.manager.overlay_tool)
-
-        if any(word in text for word in ["READY", "UP", "PREPARE"]):
-            return True
+        signature = roi_signature(ready_roi)
+        since_read = 255 if last_read is None else signature_distance(signature, last_read)
+        changed = since_read > CHANGE_THRESHOLD
+        # A near-ready frame is read once, not on every tick it stays on screen
+        looks_ready = since_read > STABLE_THRESHOLD and ready_signature is not None and \
+            signature_distance(signature, ready_signature) <= CHANGE_THRESHOLD
+
+        if changed or looks_ready:
+            # Perform the actual screen check
+            text = ocr_from_screen(ready_roi, gui_instance.manager.overlay_tool)
+            last_read = signature
+
+            if any(word in text for word in ["READY", "UP", "PREPARE"]):
+                # Next time the ready screen is recognized by its look alone
+                if ready_signature is None or signature_distance(signature, ready_signature) > STABLE_THRESHOLD:
+                    save_ready_signature(signature)
+                return True
 
         # Short sleep to prevent CPU spiking
-        time.sleep(0.7)
+        time.sleep(poll_interval)
 
     # If gui_instance.is_watching becomes False, the loop exits here
     return False
 
+@trace_run("apply")
 def apply_loadout(manager, loadout, progress_callback=None):
     """
     Main automation loop to apply a Helldivers 2 loadout.
@@ -302,14 +448,18 @@ def apply_loadout(manager, loadout, progress_callback=None):
 
     try:
         print(f"Loading Helldivers 2 loadout: {loadout["name"]}...")
+        if manager.diff_apply and manager.equipped:
+            reused = "same loadout as last time" if manager.last_loaded == loadout["name"] else "previous loadout"
+            print(f"Differential apply against the {reused}: {len(manager.equipped)} slot(s) known.")
         update_progress(5)
-        # Ensure focus_hd2_win() is imported/defined in your scope
-        focus_hd2_win()
+        # Ensure the game window has focus (a no-op for the simulator)
+        key_input.focus_game()
 
         # --- 1. STRATAGEMS (0% -> 25%) ---
         update_progress(10)
-        pydirectinput.press(manager.config.get_control("ENTER MENU", "space"))
-        time.sleep(manager.config.get_control("OCR READ DELAY", 0.3))
+        press_and_settle(manager.config.get_control("ENTER MENU", "space"),
+                         manager.config.get_roi("STRAT_ITEM_ROI", (0, 0, 0, 0)),
+                         manager.config.get_control("OCR READ DELAY", 0.3))
 
         for strat_num in range(1, 5):
             strat_key = f"stratagem_{strat_num}"
@@ -328,16 +478,17 @@ def apply_loadout(manager, loadout, progress_callback=None):
 
         # --- 2. BOOSTERS (25% -> 35%) ---
         update_progress(30)
-        pydirectinput.press(manager.config.get_control("RIGHT", "d"))
-        pydirectinput.press(manager.config.get_control("ENTER MENU", "space"))
-        time.sleep(manager.config.get_control("OCR READ DELAY", 0.3))
+        key_input.press(manager.config.get_control("RIGHT", "d"))
+        press_and_settle(manager.config.get_control("ENTER MENU", "space"),
+                         manager.config.get_roi("BOOSTER_ITEM_ROI", (0, 0, 0, 0)),
+                         manager.config.get_control("OCR READ DELAY", 0.3))
 
         if not manager.apply_booster_priority(
                 loadout["boosters"],
                 "booster",
                 manager.config.get_roi("BOOSTER_ITEM_ROI", (0, 0, 0, 0))
         ):
-            pydirectinput.press('escape')
+            key_input.press('escape')
             manager.degraded_dbs.add("booster")
 
         # --- 3. EQUIPMENT TAB (35% -> 70%) ---
@@ -348,22 +499,27 @@ def apply_loadout(manager, loadout, progress_callback=None):
             return
 
         update_progress(40)
-        pydirectinput.press(manager.config.get_control("SWITCH", "q"))
-        time.sleep(manager.config.get_control("CAT SWITCH DELAY", 0.4))
+        press_and_settle(manager.config.get_control("SWITCH", "q"),
+                         manager.config.get_roi("HELMET_ITEM_ROI", (0, 0, 0, 0)),
+                         manager.config.get_control("CAT SWITCH DELAY", 0.4))
 
+        @traced("equipment slot", "apply", ("db_key",))
         def handle_equipment(target, db_key, item_roi, cat_roi=None, cat_list=None, custom_validation_thresh=None):
             # Inner helper for repetitive equipment navigation
-            pydirectinput.press(manager.config.get_control("ENTER MENU", "space"))
-            time.sleep(manager.config.get_control("OCR READ DELAY", 0.3))
+            press_and_settle(manager.config.get_control("ENTER MENU", "space"), item_roi,
+                             manager.config.get_control("OCR READ DELAY", 0.3))
 
-            if custom_validation_thresh:
+            # Differential apply: leave the slot alone if it already holds the target
+            if manager.is_already_equipped(target, db_key, item_roi, custom_validation_thresh or 75):
+                success = True
+            elif custom_validation_thresh:
                 success = manager.navigate_to(target, db_key, item_roi, cat_roi, cat_list, validation_score=custom_validation_thresh)
             else:
                 success = manager.navigate_to(target, db_key, item_roi, cat_roi, cat_list)
 
             # Equipment sub-menus require a manual escape
-            pydirectinput.press('escape')
-            time.sleep(manager.config.get_control("OCR READ DELAY", 0.3))
+            press_and_settle('escape', item_roi, manager.config.get_control("OCR READ DELAY", 0.3))
+            manager.record_equipped(target, db_key, success)
             if not success:
                 manager.degraded_dbs.add(db_key)
 
@@ -378,7 +534,7 @@ def apply_loadout(manager, loadout, progress_callback=None):
 
         # ARMOR
         update_progress(55)
-        pydirectinput.press(manager.config.get_control("RIGHT", "d"))
+        key_input.press(manager.config.get_control("RIGHT", "d"))
         # Clean the armor name from any trailing info like "(Heavy)"
         clean_armor = re.sub(r'\s*\(.*?\)$', '', loadout["armor"]).strip()
         handle_equipment(
@@ -391,7 +547,7 @@ def apply_loadout(manager, loadout, progress_callback=None):
 
         # CAPE
         update_progress(65)
-        pydirectinput.press(manager.config.get_control("RIGHT", "d"))
+        key_input.press(manager.config.get_control("RIGHT", "d"))
         handle_equipment(
             loadout["cape"],
             "cape",
@@ -400,11 +556,11 @@ def apply_loadout(manager, loadout, progress_callback=None):
 
         # --- 4. WEAPONRY (Lower Row) (70% -> 100%) ---
         update_progress(70)
-        pydirectinput.press(manager.config.get_control("DOWN", "s"))
+        key_input.press(manager.config.get_control("DOWN", "s"))
 
         # GRENADE
         update_progress(75)
-        pydirectinput.press(manager.config.get_control("ENTER MENU", "space"))
+        key_input.press(manager.config.get_control("ENTER MENU", "space"))
         handle_equipment(
             loadout["grenade"],
             "grenade",
@@ -415,8 +571,8 @@ def apply_loadout(manager, loadout, progress_callback=None):
 
         # SECONDARY
         update_progress(85)
-        pydirectinput.press(manager.config.get_control("LEFT", "a"))
-        pydirectinput.press(manager.config.get_control("ENTER MENU", "space"))
+        key_input.press(manager.config.get_control("LEFT", "a"))
+        key_input.press(manager.config.get_control("ENTER MENU", "space"))
         handle_equipment(
             loadout["secondary"],
             "secondary",
@@ -427,8 +583,8 @@ def apply_loadout(manager, loadout, progress_callback=None):
 
         # PRIMARY
         update_progress(95)
-        pydirectinput.press(manager.config.get_control("LEFT", "a"))
-        pydirectinput.press(manager.config.get_control("ENTER MENU", "space"))
+        key_input.press(manager.config.get_control("LEFT", "a"))
+        key_input.press(manager.config.get_control("ENTER MENU", "space"))
         handle_equipment(
             loadout["primary"],
             "primary",
@@ -439,8 +595,10 @@ def apply_loadout(manager, loadout, progress_callback=None):
 
         # Final Cleanup
         update_progress(100)
-        pydirectinput.press(manager.config.get_control("SWITCH", "q"))
+        key_input.press(manager.config.get_control("SWITCH", "q"))
         manager.last_loaded = loadout["name"]
+        disk_cache.flush()
+        print(f"OCR cache: {frame_cache.stats()} Disk: {disk_cache.stats()}")
 
     except ConfigurationError as e:
         # This re-raises the error to be caught by the GUI thread
@@ -0,0 +1,178 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+
+# inotify(7) event masks
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_inotify():
+    """libc with the inotify calls, or None off Linux (or if they can't be found)."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class LoadoutWatcher:
+    """
+    Watches a loadouts folder for *.json files being added, modified or removed.
+    Uses inotify on Linux and otherwise polls the folder every poll_interval seconds.
+    on_events is called from the watcher thread with a list of (event, filename) per batch,
+    so GUI callers have to hand it to their own thread (e.g. root.after).
+    """
+    def __init__(self, folder, on_events, poll_interval=2.0):
+        self.folder = folder
+        self.on_events = on_events
+        self.poll_interval = poll_interval
+        self.mode = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._known = set()
+        self._stamps = {}
+
+    def start(self):
+        self._stamps = self._snapshot()
+        self._known = set(self._stamps)
+        self._thread = threading.Thread(target=self._run, name="loadout-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+
+    def _snapshot(self):
+        """{filename: (mtime_ns, size)} of the *.json files in the folder."""
+        stamps = {}
+        try:
+            with os.scandir(self.folder) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".json") and entry.is_file():
+                        stat = entry.stat()
+                        stamps[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        return stamps
+
+    def _emit(self, events):
+        if events:
+            try:
+                self.on_events(events)
+            except Exception as e:
+                print(f"Loadout watcher callback failed: {e}")
+
+    def _run(self):
+        libc = _load_inotify()
+        if libc is not None:
+            try:
+                self._watch_inotify(libc)
+            except OSError as e:
+                print(f"inotify unavailable ({e}), polling the loadouts folder instead.")
+        if not self._stop.is_set():
+            self._watch_polling()
+
+    def _watch_inotify(self, libc):
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        try:
+            if libc.inotify_add_watch(fd, os.fsencode(self.folder), WATCH_MASK) < 0:
+                raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+            self.mode = "inotify"
+            print(f"Watching {self.folder} with inotify.")
+            # Catch up on anything that changed between start() and the watch going live
+            events, self._stamps = self._diff_snapshot(self._stamps)
+            self._emit(events)
+
+            while not self._stop.is_set():
+                readable, _, _ = select.select([fd], [], [], 0.5)
+                if not readable:
+                    continue
+                try:
+                    buffer = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                events, folder_gone = self._parse(buffer)
+                self._emit(events)
+                if folder_gone:
+                    # Deleted or moved away: polling picks it up again if it comes back
+                    print(f"{self.folder} went away, polling for it instead.")
+                    return
+        finally:
+            os.close(fd)
+
+    def _parse(self, buffer):
+        """Turns a read of inotify events into (event, filename) pairs, one per file per batch."""
+        changes = {}
+        folder_gone = False
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buffer):
+            _, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            raw_name = buffer[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length]
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                # The kernel dropped events: fall back to comparing against the last snapshot
+                events, self._stamps = self._diff_snapshot(self._stamps)
+                changes.update((name, event) for event, name in events)
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                folder_gone = True
+                continue
+            filename = os.fsdecode(raw_name.rstrip(b"\0"))
+            if not filename.endswith(".json"):
+                continue
+
+            if mask & (IN_DELETE | IN_MOVED_FROM):
+                if filename in self._known:
+                    self._known.discard(filename)
+                    changes[filename] = "removed"
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                # Reported once the writer is done (or the synced copy is renamed into place)
+                if filename in self._known:
+                    changes.setdefault(filename, "modified")
+                else:
+                    self._known.add(filename)
+                    changes[filename] = "added"
+            # IN_CREATE alone is a file still being written; its IN_CLOSE_WRITE follows
+        return [(event, filename) for filename, event in changes.items()], folder_gone
+
+    def _diff_snapshot(self, previous):
+        """The events between a previous snapshot and the folder now, and the new snapshot."""
+        current = self._snapshot()
+        events = [(name, "removed") for name in previous if name not in current]
+        events += [(name, "added") for name in current if name not in previous]
+        events += [(name, "modified") for name, stamp in current.items()
+                   if name in previous and stamp != previous[name]]
+        self._known = set(current)
+        return [(event, name) for name, event in sorted(events)], current
+
+    def _watch_polling(self):
+        self.mode = "polling"
+        print(f"Polling {self.folder} every {self.poll_interval}s for loadout changes.")
+        while not self._stop.wait(self.poll_interval):
+            events, self._stamps = self._diff_snapshot(self._stamps)
+            self._emit(events)
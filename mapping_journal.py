@@ -0,0 +1,86 @@
+import json
+import os
+
+from utils import write_json_atomic
+
+JOURNAL_VERSION = 1
+
+
+def journal_path(db_path):
+    """item_databases/primary_db.json -> item_databases/primary_db.journal.json"""
+    return os.path.splitext(db_path)[0] + ".journal.json"
+
+
+class MappingJournal:
+    """
+    Checkpoint of a mapping run, rewritten after every confirmed row, so a run stopped by the
+    failsafe, a focus loss or a crash picks up where it stopped instead of starting over.
+    Grids are keyed by category ("" for flat grids), like the grid metadata.
+    """
+    def __init__(self, db_path, categories=()):
+        self.path = journal_path(db_path)
+        self.categories = list(categories)
+        self.master_db = {}
+        self.grids = {}
+        self.done = []
+
+    @classmethod
+    def load(cls, db_path, categories=()):
+        """Returns the journal of an interrupted run of the same mapping, or None."""
+        journal = cls(db_path, categories)
+        try:
+            with open(journal.path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if data.get("version") != JOURNAL_VERSION or data.get("categories") != journal.categories:
+            print(f"Ignoring {journal.path}: it belongs to a different mapping.")
+            return None
+
+        journal.master_db = data.get("master_db", {})
+        journal.grids = data.get("grids", {})
+        journal.done = data.get("done", [])
+        return journal
+
+    @staticmethod
+    def exists(db_path):
+        return os.path.exists(journal_path(db_path))
+
+    def grid(self, category=""):
+        return self.grids.setdefault(category, {"row_lengths": [], "uncertain_rows": []})
+
+    def rows_done(self, category=""):
+        return len(self.grid(category)["row_lengths"])
+
+    def record_row(self, category, row_length, uncertain):
+        """Confirms the next row of a category (its items already in master_db) and saves."""
+        grid = self.grid(category)
+        if uncertain:
+            grid["uncertain_rows"].append(len(grid["row_lengths"]))
+        grid["row_lengths"].append(row_length)
+        self.save()
+
+    def finish_category(self, category):
+        if category not in self.done:
+            self.done.append(category)
+        self.save()
+
+    def summary(self):
+        rows = sum(len(grid["row_lengths"]) for grid in self.grids.values())
+        return f"{len(self.master_db)} items in {rows} rows, {len(self.done)} categories finished"
+
+    def save(self):
+        write_json_atomic(self.path, {
+            "version": JOURNAL_VERSION,
+            "categories": self.categories,
+            "master_db": self.master_db,
+            "grids": self.grids,
+            "done": self.done
+        })
+
+    def discard(self):
+        """Called once the database itself is written."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
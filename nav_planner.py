@@ -0,0 +1,194 @@
+import json
+import os
+from collections import deque
+
+from utils import write_json_atomic
+
+GRID_METADATA_VERSION = 2
+# Version 1 files are still read; they recorded column_overflow without checking it (see load_grid_metadata)
+OLDEST_GRID_METADATA_VERSION = 1
+
+# What a tab switch does to the cursor (see LoadoutManager._align_category)
+TAB_SWITCH_RULE = {"row": "reset", "column": "keep"}
+
+
+class GridModel:
+    """
+    Shape of one menu grid (one category tab, or the whole menu for flat grids).
+    row_lengths[r] is the number of cells in row r.
+    wrap_rows: pressing right on the last cell goes back to the first cell of the row.
+    wrap_columns: pressing down on the last row goes back to the first row (flat grids only,
+    in tabbed menus it switches category instead).
+    column_overflow: what happens when moving vertically into a row shorter than the current
+    column. "block" (the default) never plans such a move: going sideways first costs the same
+    presses. "clamp" lands on the row's last cell, for menus known to behave that way.
+    uncertain_rows: rows whose true length the mapper couldn't confirm (the B-01 rows), which
+    are never wrapped around.
+    """
+    def __init__(self, row_lengths, wrap_rows=True, wrap_columns=False, column_overflow="block",
+                 uncertain_rows=()):
+        self.row_lengths = list(row_lengths)
+        self.wrap_rows = wrap_rows
+        self.wrap_columns = wrap_columns
+        self.column_overflow = column_overflow
+        self.uncertain_rows = set(uncertain_rows)
+
+    @property
+    def row_count(self):
+        return len(self.row_lengths)
+
+    def row_length(self, row):
+        if 0 <= row < len(self.row_lengths):
+            return self.row_lengths[row]
+        return 0
+
+    def contains(self, pos):
+        return 0 <= pos[0] < self.row_count and 0 <= pos[1] < self.row_length(pos[0])
+
+    @classmethod
+    def from_db(cls, db, category=None):
+        """Derives the grid shape from the mapped item positions (for DBs mapped without metadata)."""
+        row_lengths = []
+        for details in db.values():
+            if category is not None and details.get("cat") != category:
+                continue
+            row, col = details["pos"]
+            while len(row_lengths) <= row:
+                row_lengths.append(0)
+            row_lengths[row] = max(row_lengths[row], col + 1)
+
+        # Tabbed grids switch category when scrolling past the last row
+        return cls(row_lengths, wrap_rows=True, wrap_columns=category is None)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("row_lengths", []), data.get("wrap_rows", True), data.get("wrap_columns", False),
+                   data.get("column_overflow", "block"), data.get("uncertain_rows", []))
+
+    def to_dict(self):
+        return {
+            "row_lengths": self.row_lengths,
+            "wrap_rows": self.wrap_rows,
+            "wrap_columns": self.wrap_columns,
+            "column_overflow": self.column_overflow,
+            "uncertain_rows": sorted(self.uncertain_rows)
+        }
+
+    def neighbours(self, pos, allow_wrap=True):
+        """Yields (direction, new_pos) for every key press that is safe from pos."""
+        row, col = pos
+        length = self.row_length(row)
+        wrap_row = allow_wrap and self.wrap_rows and row not in self.uncertain_rows
+
+        # Vertical moves. Scrolling off a tabbed grid would switch category, so it isn't allowed.
+        for direction, new_row in (("DOWN", row + 1), ("UP", row - 1)):
+            if not 0 <= new_row < self.row_count:
+                if not (allow_wrap and self.wrap_columns):
+                    continue
+                new_row %= self.row_count
+            new_length = self.row_length(new_row)
+            if new_length == 0:
+                continue
+            if col >= new_length:
+                if self.column_overflow != "clamp":
+                    continue
+                yield direction, (new_row, new_length - 1)
+            else:
+                yield direction, (new_row, col)
+
+        # Horizontal moves
+        if col + 1 < length:
+            yield "RIGHT", (row, col + 1)
+        elif wrap_row and length > 1:
+            yield "RIGHT", (row, 0)
+        if col > 0:
+            yield "LEFT", (row, col - 1)
+        elif wrap_row and length > 1:
+            yield "LEFT", (row, length - 1)
+
+
+def _direct_moves(start, target):
+    """
+    Used when there is no model to plan over. Moves left first, then along the rows, then right,
+    so the vertical moves happen in the smaller of the two columns, which the target row has.
+    """
+    rows = target[0] - start[0]
+    cols = target[1] - start[1]
+    return ["LEFT"] * max(0, -cols) + ["DOWN" if rows > 0 else "UP"] * abs(rows) + ["RIGHT"] * max(0, cols)
+
+
+def shortest_route(start, target, model, allow_wrap=True):
+    """Breadth-first search over the grid model. Returns the directions, or None if unreachable."""
+    start, target = tuple(start), tuple(target)
+    previous = {start: None}
+    queue = deque([start])
+
+    while queue:
+        pos = queue.popleft()
+        if pos == target:
+            route = []
+            while previous[pos] is not None:
+                pos, direction = previous[pos]
+                route.append(direction)
+            return route[::-1]
+
+        for direction, new_pos in model.neighbours(pos, allow_wrap):
+            if new_pos not in previous:
+                previous[new_pos] = (pos, direction)
+                queue.append(new_pos)
+    return None
+
+
+def plan_moves(start, target, model=None, keys=None, allow_wrap=True):
+    """
+    Returns the list of key presses with the fewest presses from start to target ([row, col]).
+    Falls back to the direct rows-then-columns route if either cell is outside the model.
+    keys: {"UP": .., "DOWN": .., "LEFT": .., "RIGHT": ..}
+    """
+    keys = keys or {"UP": "w", "DOWN": "s", "LEFT": "a", "RIGHT": "d"}
+
+    route = None
+    if model is not None and model.contains(start) and model.contains(target):
+        route = shortest_route(start, target, model, allow_wrap)
+    if route is None:
+        route = _direct_moves(start, target)
+
+    return [keys[direction] for direction in route]
+
+
+def grid_metadata_path(db_path):
+    """item_databases/primary_db.json -> item_databases/primary_db_grid.json"""
+    return os.path.splitext(db_path)[0] + "_grid.json"
+
+
+def save_grid_metadata(db_path, models):
+    """
+    Writes the grid shapes recorded by a mapping run next to the database.
+    models: {category name ("" for flat grids): GridModel}
+    """
+    data = {
+        "version": GRID_METADATA_VERSION,
+        "tab_switch": TAB_SWITCH_RULE,
+        "categories": {category: model.to_dict() for category, model in models.items()}
+    }
+    # A half-written file would be read as no metadata at all
+    write_json_atomic(grid_metadata_path(db_path), data)
+
+
+def load_grid_metadata(db_path):
+    """Returns {category: GridModel}, or {} if the database was mapped without metadata."""
+    try:
+        with open(grid_metadata_path(db_path), "r") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    version = data.get("version")
+    if not isinstance(version, int) or not OLDEST_GRID_METADATA_VERSION <= version <= GRID_METADATA_VERSION:
+        return {}
+
+    models = {category: GridModel.from_dict(model) for category, model in data.get("categories", {}).items()}
+    if version == 1:
+        # Every version 1 file says "clamp": it was the default, not something the mapper saw
+        for model in models.values():
+            model.column_overflow = "block"
+    return models
@@ -0,0 +1,227 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+# noinspection PyPackageRequirements
+import cv2
+import numpy as np
+
+from environment_setup import get_base_path
+
+# Width of the downsampled thumbnail used to compare frames
+SIGNATURE_WIDTH = 96
+# Minimum thumbnail height for text lookups. A wide, short ROI squeezed to 96 pixels wide
+# blurs thin glyphs until words like OFFENSIVE and DEFENSIVE look alike.
+TEXT_SIGNATURE_HEIGHT = 16
+
+
+def frame_signature(frame, width=SIGNATURE_WIDTH, min_height=None):
+    """
+    Cheap perceptual fingerprint of an ROI crop: a small grayscale thumbnail.
+    Area downsampling averages out capture noise, while a changed glyph still
+    shows up as a handful of strongly different pixels.
+    min_height: widen the thumbnail (up to the crop's own size) until it is at least this tall
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    if min_height:
+        width = min(gray.shape[1], max(width, round(gray.shape[1] * min_height / gray.shape[0])))
+    height = max(4, round(gray.shape[0] * width / gray.shape[1]))
+    return cv2.resize(gray, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def text_signature(frame):
+    """The signature OCR results are cached under (see TEXT_SIGNATURE_HEIGHT)."""
+    return frame_signature(frame, min_height=TEXT_SIGNATURE_HEIGHT)
+
+
+def frame_hash(signature):
+    """Content hash of a signature, quantized so tiny brightness jitter still hashes the same."""
+    quantized = np.ascontiguousarray(signature >> 4)
+    digest = hashlib.blake2b(quantized.tobytes(), digest_size=16)
+    digest.update(bytes(str(signature.shape), "ascii"))
+    return digest.digest()
+
+
+def signature_distance(sig_a, sig_b):
+    """Largest per-pixel difference between two signatures (255 if they can't be compared)."""
+    if sig_a.shape != sig_b.shape:
+        return 255
+    return int(cv2.absdiff(sig_a, sig_b).max())
+
+
+class FrameCache:
+    """
+    Bounded LRU cache of OCR results keyed by the frame hash of the ROI crop.
+    A frame whose signature is within max_distance of a recently cached one counts as the same frame.
+    """
+    def __init__(self, max_entries=512, max_distance=40, near_scan=64):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.near_scan = near_scan  # Only the most recent entries are checked for near matches
+        self._entries = OrderedDict()  # frame hash -> (signature, text)
+        self._lock = threading.Lock()
+
+        # Counters for tuning the size and distance
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    def get(self, signature, digest=None):
+        """Returns the cached text for this frame, or None."""
+        digest = digest or frame_hash(signature)
+        with self._lock:
+            # 1. Exact frame
+            if digest in self._entries:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return self._entries[digest][1]
+
+            # 2. Near-identical frame
+            if self.max_distance > 0:
+                for idx, (cached_digest, (cached_sig, text)) in enumerate(reversed(self._entries.items())):
+                    if idx >= self.near_scan:
+                        break
+                    if signature_distance(cached_sig, signature) <= self.max_distance:
+                        self._entries.move_to_end(cached_digest)
+                        self.hits += 1
+                        self.near_hits += 1
+                        return text
+
+            self.misses += 1
+            return None
+
+    def put(self, signature, text, digest=None):
+        digest = digest or frame_hash(signature)
+        with self._lock:
+            self._entries[digest] = (signature, text)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+    def reset_stats(self):
+        self.hits = self.near_hits = self.misses = 0
+
+
+class DiskFrameCache:
+    """
+    Persistent, content-addressed store of frame hash -> recognized text shared by every session.
+    The file is a fixed-size .npy array of records that is memory-mapped on the first lookup,
+    so only the records that are actually touched get paged in (and importing this module
+    doesn't create it). When full, the least recently used record is overwritten.
+    """
+    RECORD_DTYPE = np.dtype([("digest", "V16"), ("last_used", "<u8"), ("text", "S96")])
+
+    def __init__(self, filepath, max_entries=20000):
+        self.filepath = filepath
+        self.max_entries = max_entries
+        self.records = None
+        self._opened = False
+        self._index = {}  # frame hash -> record slot
+        self._free_slots = []
+        self._clock = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _open(self):
+        """Maps the file the first time it is needed. Call with the lock held."""
+        if not self._opened:
+            self._opened = True
+            self.load()
+
+    def load(self):
+        try:
+            if os.path.exists(self.filepath):
+                records = np.lib.format.open_memmap(self.filepath, mode="r+")
+                # A different layout or size cap means an old file: start over
+                if records.dtype != self.RECORD_DTYPE or records.shape != (self.max_entries,):
+                    del records
+                    os.remove(self.filepath)
+            if not os.path.exists(self.filepath):
+                np.lib.format.open_memmap(self.filepath, mode="w+", dtype=self.RECORD_DTYPE,
+                                          shape=(self.max_entries,)).flush()
+            self.records = np.lib.format.open_memmap(self.filepath, mode="r+")
+        except (OSError, ValueError) as e:
+            print(f"Warning: OCR disk cache disabled ({e})")
+            self.records = None
+            return
+
+        # Rebuild the lookup table from the used slots (a used slot always has last_used > 0)
+        last_used = self.records["last_used"]
+        for slot in np.flatnonzero(last_used):
+            self._index[bytes(self.records["digest"][slot])] = int(slot)
+        self._free_slots = np.flatnonzero(last_used == 0)[::-1].tolist()
+        self._clock = int(last_used.max()) if len(last_used) else 0
+
+    def get(self, digest):
+        with self._lock:
+            self._open()
+            if self.records is None:
+                return None
+            slot = self._index.get(digest)
+            if slot is None:
+                self.misses += 1
+                return None
+            self._clock += 1
+            self.records["last_used"][slot] = self._clock
+            self.hits += 1
+            return self.records["text"][slot].decode("utf-8", errors="ignore")
+
+    def put(self, digest, text):
+        encoded = text.encode("utf-8")
+        if len(encoded) > self.RECORD_DTYPE["text"].itemsize:
+            return  # Too long to store without truncating it into a wrong answer
+
+        with self._lock:
+            self._open()
+            if self.records is None:
+                return
+            slot = self._index.get(digest)
+            if slot is None:
+                if self._free_slots:
+                    slot = self._free_slots.pop()
+                else:
+                    # Evict the least recently used record
+                    slot = int(np.argmin(self.records["last_used"]))
+                    self._index.pop(bytes(self.records["digest"][slot]), None)
+                self._index[digest] = slot
+
+            self._clock += 1
+            self.records[slot] = (digest, self._clock, encoded)
+
+    def flush(self):
+        if self.records is not None:
+            self.records.flush()
+
+    def detach(self):
+        """Stops using the file for the rest of the session (simulated runs must not fill it)."""
+        with self._lock:
+            self.flush()
+            self._opened = True
+            self.records = None
+            self._index = {}
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._index)}
+
+
+# Shared in-process cache used by ocr_from_screen
+frame_cache = FrameCache()
+
+# Shared on-disk cache, memory-mapped on first use
+disk_cache = DiskFrameCache(os.path.join(get_base_path(), "ocr_cache.npy"))
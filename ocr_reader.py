@@ -0,0 +1,67 @@
+import threading
+import time
+
+
+class OCRReaderProvider:
+    """
+    Owns the single EasyOCR reader for the process.
+    Importing easyocr pulls in torch and the model weights, so the reader is built on a
+    background thread and only waited on when the first real OCR call needs it.
+    """
+    def __init__(self, languages=("en",), gpu=False):
+        # Set gpu=True if you have an NVIDIA GPU
+        self.languages = list(languages)
+        self.gpu = gpu
+
+        self._reader = None
+        self._error = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    def start_warmup(self):
+        """Starts loading the reader in the background. Safe to call more than once."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._load, name="OCRWarmup", daemon=True)
+                self._thread.start()
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            # Deferred import: this is the expensive part (torch + model weights)
+            import easyocr
+            self._reader = easyocr.Reader(self.languages, gpu=self.gpu, verbose=False)
+            print(f"OCR reader ready in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            self._error = e
+            print(f"OCR reader failed to load: {e}")
+        finally:
+            self._ready.set()
+
+    @property
+    def status(self):
+        if self._thread is None:
+            return "IDLE"
+        if not self._ready.is_set():
+            return "WARMING UP"
+        return "FAILED" if self._error else "READY"
+
+    def is_ready(self):
+        return self._ready.is_set() and self._error is None
+
+    def get(self, timeout=None):
+        """
+        Returns the loaded reader, blocking until the warmup finishes.
+        Starts the warmup itself if nobody has yet (e.g. the mapper used without the GUI).
+        """
+        self.start_warmup()
+        if not self._ready.wait(timeout):
+            raise TimeoutError("OCR reader is still warming up.")
+        if self._error:
+            raise RuntimeError(f"OCR reader failed to load: {self._error}") from self._error
+        return self._reader
+
+
+# Shared provider for the whole process
+reader_provider = OCRReaderProvider()
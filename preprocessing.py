@@ -0,0 +1,86 @@
+import threading
+
+# noinspection PyPackageRequirements
+import cv2
+
+from utils import ConfigurationError, ConfigManager
+
+# Used for ROIs without an entry in the "preprocess" section of settings.json.
+# Grayscale gives the same cache signatures as the raw color crops.
+DEFAULT_STEPS = ["grayscale"]
+
+
+def _grayscale(frame, _step):
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+
+
+def _rescale(frame, step):
+    """Fixed text height. Shrinking averages pixels, enlarging interpolates."""
+    height = int(step.get("height", 32))
+    width = max(1, round(frame.shape[1] * height / frame.shape[0]))
+    interpolation = cv2.INTER_AREA if height < frame.shape[0] else cv2.INTER_CUBIC
+    return cv2.resize(frame, (width, height), interpolation=interpolation)
+
+
+def _threshold(frame, step):
+    gray = _grayscale(frame, step)
+    if step.get("method", "otsu") == "adaptive":
+        # Odd block size, in pixels, of the neighbourhood each threshold is computed over
+        block_size = int(step.get("block_size", 15)) | 1
+        return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY,
+                                     block_size, float(step.get("c", 5)))
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return binary
+
+
+def _invert(frame, _step):
+    """Light text on a dark background (e.g. the yellow highlights) becomes dark on light."""
+    return cv2.bitwise_not(frame)
+
+
+OPERATIONS = {
+    "grayscale": _grayscale,
+    "rescale": _rescale,
+    "threshold": _threshold,
+    "invert": _invert,
+}
+
+
+class Pipeline:
+    """
+    An ordered list of preprocessing steps for one ROI, e.g.
+    ["grayscale", {"op": "rescale", "height": 32}, {"op": "threshold", "method": "otsu"}, "invert"]
+    A step is an operation name or an object with "op" and its parameters.
+    """
+    def __init__(self, steps):
+        self.steps = []
+        for step in steps:
+            step = {"op": step} if isinstance(step, str) else dict(step)
+            if step.get("op") not in OPERATIONS:
+                raise ConfigurationError(f"Unknown preprocessing step {step}. Choose from {list(OPERATIONS)}.")
+            self.steps.append((OPERATIONS[step["op"]], step))
+
+    def apply(self, frame):
+        for operation, step in self.steps:
+            frame = operation(frame, step)
+        return frame
+
+
+_pipelines = {}
+_settings = None
+_lock = threading.Lock()
+
+
+def pipeline_for(roi_key):
+    """Returns the (cached) pipeline configured for an ROI key, or the "DEFAULT" one."""
+    global _settings
+    with _lock:
+        if roi_key not in _pipelines:
+            if _settings is None:
+                _settings = ConfigManager().get_section("preprocess")
+            _pipelines[roi_key] = Pipeline(_settings.get(roi_key, _settings.get("DEFAULT", DEFAULT_STEPS)))
+        return _pipelines[roi_key]
+
+
+def preprocess(frame, roi_key=None):
+    return pipeline_for(roi_key).apply(frame)
@@ -0,0 +1,334 @@
+import atexit
+import bisect
+import os
+import threading
+
+# noinspection PyPackageRequirements
+import cv2
+import numpy as np
+
+from environment_setup import get_base_path
+from ocr_reader import reader_provider
+from ui_sync import trim_edges
+from utils import ConfigManager
+
+HD_ALLOWLIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-&/ "
+
+# Common misreads of the game's font
+FONT_CORRECTIONS = {
+    "HEAUY": "HEAVY", "ADUANCED": "ADVANCED", "CONCUSSIUE": "CONCUSSIVE",
+    "SERUICE": "SERVICE", "EUAC": "EVAC", "EUIDENCE": "EVIDENCE",
+    "OFFENSIUE": "OFFENSIVE", "DEFENSIUE": "DEFENSIVE", "SERUO": "SERVO",
+    "HOUER": "HOVER"
+}
+
+# Every template is rescaled to this height so they can be compared directly
+TEMPLATE_HEIGHT = 24
+
+
+def binarize_text(frame):
+    """
+    Turns an ROI crop into a normalized black/white word image:
+    text is white, cropped to its bounding box and rescaled to TEMPLATE_HEIGHT.
+    Returns None if the crop has no text in it.
+    """
+    # The overlay's border sits on the crop's edge while mapping; it would survive Otsu and
+    # stretch the bounding box to the whole crop
+    frame = trim_edges(frame)
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    # The text is always the minority of the pixels, so make it the white part
+    if cv2.countNonZero(binary) > binary.size // 2:
+        binary = cv2.bitwise_not(binary)
+
+    points = cv2.findNonZero(binary)
+    if points is None:
+        return None
+
+    # Crop to the ink so small ROI offsets don't matter
+    x, y, w, h = cv2.boundingRect(points)
+    binary = binary[y:y + h, x:x + w]
+    width = max(1, round(w * TEMPLATE_HEIGHT / h))
+    return cv2.resize(binary, (width, TEMPLATE_HEIGHT), interpolation=cv2.INTER_AREA)
+
+
+class Recognizer:
+    """Base class for the text recognizers used by ocr_from_screen."""
+    name = "base"
+
+    def recognize(self, frame, roi_key=None):
+        """Returns the text in the frame, or None if this recognizer can't tell."""
+        raise NotImplementedError
+
+    def recognize_many(self, items):
+        """items: [(frame, roi_key), ...]. Returns a text (or None) per item, in order."""
+        return [self.recognize(frame, roi_key) for frame, roi_key in items]
+
+
+class EasyOCRRecognizer(Recognizer):
+    """
+    EasyOCR. The calibrated ROIs are tight single-line boxes, so by default the crop is fed
+    straight to the recognition network as one known text box ("recognize" mode). The CRAFT
+    detector and paragraph grouping ("detect" mode) only run as a fallback when the recognizer
+    isn't confident, or for ROIs set to "detect" in the "ocr_modes" section of settings.json.
+    """
+    name = "easyocr"
+
+    def __init__(self, min_confidence=0.4):
+        self.min_confidence = min_confidence
+        self._modes = None
+
+    def mode(self, roi_key):
+        if self._modes is None:
+            self._modes = ConfigManager().get_section("ocr_modes")
+        return self._modes.get(roi_key, self._modes.get("DEFAULT", "recognize"))
+
+    @staticmethod
+    def clean(raw_text):
+        text = raw_text.upper()
+        for error, correction in FONT_CORRECTIONS.items():
+            text = text.replace(error, correction)
+        return text
+
+    @staticmethod
+    def recognize_line(reader, frame):
+        """Recognition only: the whole crop is the text box. Returns (text, confidence)."""
+        height, width = frame.shape[:2]
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        results = reader.recognize(gray, horizontal_list=[[0, width, 0, height]], free_list=[],
+                                   detail=1, allowlist=HD_ALLOWLIST)
+        if not results:
+            return "", 0.0
+        _, text, confidence = results[0]
+        return text, float(confidence)
+
+    @staticmethod
+    def recognize_lines(reader, frames):
+        """
+        Recognition only, for several crops in one call: the crops are stacked into a single
+        grayscale canvas with one text box each. Returns [(text, confidence), ...] in order.
+        """
+        grays = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame for frame in frames]
+        canvas = np.zeros((sum(g.shape[0] for g in grays), max(g.shape[1] for g in grays)), dtype=np.uint8)
+
+        boxes = []
+        tops = []
+        y = 0
+        for gray in grays:
+            height, width = gray.shape
+            canvas[y:y + height, :width] = gray
+            boxes.append([0, width, y, y + height])
+            tops.append(y)
+            y += height
+
+        results = reader.recognize(canvas, horizontal_list=boxes, free_list=[], detail=1,
+                                   allowlist=HD_ALLOWLIST, batch_size=len(boxes))
+
+        # Results come back sorted by position, so map them back by their top edge
+        lines = [("", 0.0)] * len(frames)
+        for box, text, confidence in results:
+            top = min(point[1] for point in box)
+            idx = max(0, bisect.bisect_right(tops, top) - 1)
+            lines[idx] = (text, float(confidence))
+        return lines
+
+    def recognize_many(self, items):
+        if not items:
+            return []
+        reader = reader_provider.get()
+        texts = [None] * len(items)
+
+        batch = [idx for idx, (_, roi_key) in enumerate(items) if self.mode(roi_key) == "recognize"]
+        if batch:
+            lines = self.recognize_lines(reader, [items[idx][0] for idx in batch])
+            for idx, (text, confidence) in zip(batch, lines):
+                if text.strip() and confidence >= self.min_confidence:
+                    texts[idx] = self.clean(text)
+
+        # Detection fallback, one crop at a time
+        for idx, (frame, _) in enumerate(items):
+            if texts[idx] is None:
+                results = reader.readtext(frame, detail=0, paragraph=True, allowlist=HD_ALLOWLIST)
+                texts[idx] = self.clean(" ".join(results) if results else "")
+        return texts
+
+    def recognize(self, frame, roi_key=None):
+        # Blocks only if the reader is still warming up
+        reader = reader_provider.get()
+
+        if self.mode(roi_key) == "recognize":
+            text, confidence = self.recognize_line(reader, frame)
+            if text.strip() and confidence >= self.min_confidence:
+                return self.clean(text)
+
+        # Full detection + recognition. Slow, but reads anything.
+        results = reader.readtext(frame, detail=0, paragraph=True, allowlist=HD_ALLOWLIST)
+        return self.clean(" ".join(results) if results else "")
+
+
+class TemplateLibrary:
+    """
+    The binarized word templates captured for one ROI, keyed by the text they show.
+    Saved to item_databases/templates/<ROI_KEY>.npz by save_if_dirty(), not on every add().
+    """
+    def __init__(self, roi_key):
+        self.roi_key = roi_key
+        self.filepath = os.path.join(get_base_path(), "item_databases", "templates", f"{roi_key}.npz")
+        self.templates = {}
+        self.roi_size = None
+        self.dirty = False
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.filepath):
+            return
+        try:
+            with np.load(self.filepath, allow_pickle=False) as data:
+                labels = [str(label) for label in data["labels"]]
+                self.roi_size = tuple(int(v) for v in data["roi_size"])
+                self.templates = {label: data[f"t{idx}"] for idx, label in enumerate(labels)}
+        except Exception as e:
+            print(f"Warning: could not load templates for {self.roi_key}: {e}")
+            self.templates = {}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        labels = list(self.templates.keys())
+        arrays = {f"t{idx}": self.templates[label] for idx, label in enumerate(labels)}
+
+        # Write to a temp file first so a crash mid-save can't corrupt the library
+        tmp_path = self.filepath + ".tmp.npz"
+        np.savez_compressed(tmp_path, labels=np.array(labels), roi_size=np.array(self.roi_size), **arrays)
+        os.replace(tmp_path, self.filepath)
+
+    def save_if_dirty(self):
+        with self._lock:
+            if not self.dirty:
+                return
+            try:
+                self.save()
+                self.dirty = False
+            except OSError as e:
+                print(f"Warning: could not save templates for {self.roi_key}: {e}")
+
+    def add(self, text, template, roi_size):
+        with self._lock:
+            # A recalibrated ROI makes the old templates useless
+            if self.roi_size != tuple(roi_size):
+                self.templates = {}
+                self.roi_size = tuple(roi_size)
+            self.templates[text] = template
+            self.dirty = True
+
+    def match(self, template):
+        """Returns (best_text, best_score, runner_up_score) using normalized cross-correlation."""
+        best_text, best_score, runner_up = None, -1.0, -1.0
+        query_w = template.shape[1]
+
+        for text, candidate in self.templates.items():
+            # Different word lengths can't be the same item
+            if abs(candidate.shape[1] - query_w) > max(2, query_w * 0.08):
+                continue
+            if candidate.shape != template.shape:
+                candidate = cv2.resize(candidate, (query_w, TEMPLATE_HEIGHT), interpolation=cv2.INTER_AREA)
+
+            score = float(cv2.matchTemplate(template, candidate, cv2.TM_CCOEFF_NORMED)[0][0])
+            if score > best_score:
+                best_text, best_score, runner_up = text, score, best_score
+            elif score > runner_up:
+                runner_up = score
+
+        return best_text, best_score, runner_up
+
+
+class TemplateRecognizer(Recognizer):
+    """
+    Fast path for text we have already seen: matches the crop against the word templates
+    captured while mapping. Only answers when the match is confident and unambiguous.
+    """
+    name = "template"
+
+    def __init__(self, min_score=0.92, min_margin=0.03):
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.libraries = {}
+        self._lock = threading.Lock()
+
+    def library(self, roi_key):
+        with self._lock:
+            if roi_key not in self.libraries:
+                self.libraries[roi_key] = TemplateLibrary(roi_key)
+            return self.libraries[roi_key]
+
+    def recognize(self, frame, roi_key=None):
+        if not roi_key:
+            return None
+
+        library = self.library(roi_key)
+        if not library.templates or library.roi_size != frame.shape[:2]:
+            return None
+
+        template = binarize_text(frame)
+        if template is None:
+            return None
+
+        text, score, runner_up = library.match(template)
+        if score >= self.min_score and score - runner_up >= self.min_margin:
+            return text
+        return None
+
+    def learn(self, frame, roi_key, text):
+        """Stores the crop as the template for a known piece of text."""
+        if not roi_key or not text:
+            return
+        template = binarize_text(frame)
+        if template is not None:
+            self.library(roi_key).add(text, template, frame.shape[:2])
+
+    def flush(self):
+        """Saves the libraries that learned something since the last flush."""
+        with self._lock:
+            libraries = list(self.libraries.values())
+        for library in libraries:
+            library.save_if_dirty()
+
+
+class RecognizerChain:
+    """Tries each recognizer in order and returns the first answer."""
+    def __init__(self, recognizers):
+        self.recognizers = list(recognizers)
+
+    def recognize(self, frame, roi_key=None):
+        """Returns (text, name of the recognizer that produced it)."""
+        for recognizer in self.recognizers:
+            text = recognizer.recognize(frame, roi_key)
+            if text is not None:
+                return text, recognizer.name
+        return "", None
+
+    def recognize_many(self, items):
+        """Batched recognize(): each recognizer gets every item the previous ones couldn't read."""
+        results = [("", None)] * len(items)
+        pending = list(range(len(items)))
+        for recognizer in self.recognizers:
+            if not pending:
+                break
+            texts = recognizer.recognize_many([items[idx] for idx in pending])
+            for idx, text in zip(pending, texts):
+                if text is not None:
+                    results[idx] = (text, recognizer.name)
+            pending = [idx for idx, text in zip(pending, texts) if text is None]
+        return results
+
+
+template_recognizer = TemplateRecognizer()
+# Mapping runs flush when they finish; this catches anything learned outside of one
+atexit.register(template_recognizer.flush)
+recognizer_chain = RecognizerChain([template_recognizer, EasyOCRRecognizer()])
+
+
+def set_recognizers(recognizers):
+    """Replaces the active recognizer chain (e.g. to plug in a different OCR engine)."""
+    recognizer_chain.recognizers = list(recognizers)
@@ -0,0 +1,254 @@
+import glob
+import os
+import threading
+
+# noinspection PyPackageRequirements
+import cv2
+import numpy as np
+
+from tracing import traced
+from utils import ConfigurationError, ConfigManager
+
+# Optional: much faster native grabber (XShm on Linux, BitBlt on Windows)
+try:
+    import mss
+except ImportError:
+    mss = None
+
+
+class CaptureBackend:
+    """Base class for the screen grabbers used by grab_frame."""
+    name = "base"
+
+    def grab(self, roi_coords):
+        """Returns the (left, top, width, height) region as a BGR NumPy array."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PyAutoGUIBackend(CaptureBackend):
+    """Portable but slow: goes through PIL and, on some platforms, a full-screen grab."""
+    name = "pyautogui"
+
+    def __init__(self):
+        # Imported on first use: it needs a display, which headless (simulator) runs don't have
+        import pyautogui
+        pyautogui.FAILSAFE = True
+        pyautogui.PAUSE = 0.1
+        self._pyautogui = pyautogui
+
+    def grab(self, roi_coords):
+        screenshot = self._pyautogui.screenshot(region=tuple(roi_coords))
+        if screenshot is None:
+            raise ConfigurationError(f"Failed to capture screenshot at {roi_coords}.")
+        return cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+
+
+class MSSBackend(CaptureBackend):
+    """Native grabber from the mss package. Its handles are per thread, so each thread gets its own."""
+    name = "mss"
+
+    def __init__(self):
+        if mss is None:
+            raise ConfigurationError("The 'mss' capture backend needs the mss package (pip install mss).")
+        self._local = threading.local()
+
+    def _grabber(self):
+        if not hasattr(self._local, "sct"):
+            self._local.sct = mss.mss()
+        return self._local.sct
+
+    def grab(self, roi_coords):
+        left, top, width, height = roi_coords
+        shot = self._grabber().grab({"left": left, "top": top, "width": width, "height": height})
+        # mss hands back BGRA, so only the alpha channel has to go
+        return cv2.cvtColor(np.asarray(shot), cv2.COLOR_BGRA2BGR)
+
+
+class ReplayBackend(CaptureBackend):
+    """
+    Serves recorded frames instead of the screen, for benchmarks and regression runs on
+    machines without the game (or a display).
+    source: a folder of .png / .npz frames (played in name order) or a single file.
+    An .npz frame holds "frame" and optionally "origin" (the screen position of its top-left
+    pixel); a .png is treated as a full-screen frame.
+    advance_on_grab: move to the next frame after every grab, otherwise call advance().
+    """
+    name = "replay"
+
+    def __init__(self, source, loop=True, advance_on_grab=True):
+        if os.path.isdir(source):
+            paths = sorted(glob.glob(os.path.join(source, "*.png")) + glob.glob(os.path.join(source, "*.npz")))
+        else:
+            paths = [source]
+        if not paths:
+            raise ConfigurationError(f"No recorded frames found in {source}.")
+
+        self.frames = [self._load(path) for path in paths]
+        self.loop = loop
+        self.advance_on_grab = advance_on_grab
+        self.position = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _load(path):
+        if path.endswith(".npz"):
+            with np.load(path, allow_pickle=False) as data:
+                origin = tuple(int(v) for v in data["origin"]) if "origin" in data else (0, 0)
+                return data["frame"], origin
+        frame = cv2.imread(path, cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ConfigurationError(f"Could not read recorded frame {path}.")
+        return frame, (0, 0)
+
+    def advance(self):
+        with self._lock:
+            if self.position + 1 < len(self.frames):
+                self.position += 1
+            elif self.loop:
+                self.position = 0
+
+    def grab(self, roi_coords):
+        with self._lock:
+            frame, (origin_x, origin_y) = self.frames[self.position]
+        left, top, width, height = roi_coords
+        x, y = left - origin_x, top - origin_y
+        if x < 0 or y < 0 or x + width > frame.shape[1] or y + height > frame.shape[0]:
+            raise ConfigurationError(f"ROI {roi_coords} is outside the recorded frame.")
+
+        crop = frame[y:y + height, x:x + width]
+        if self.advance_on_grab:
+            self.advance()
+        return crop
+
+
+class RecordingBackend(CaptureBackend):
+    """Wraps another backend and saves every grab as an .npz frame that ReplayBackend can play back."""
+    name = "recording"
+
+    def __init__(self, backend, folder):
+        self.backend = backend
+        self.folder = folder
+        self.count = 0
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+
+    def grab(self, roi_coords):
+        frame = self.backend.grab(roi_coords)
+        with self._lock:
+            path = os.path.join(self.folder, f"frame_{self.count:06d}.npz")
+            self.count += 1
+        np.savez(path, frame=frame, origin=np.array(roi_coords[:2]))
+        return frame
+
+    def close(self):
+        self.backend.close()
+
+
+BACKENDS = {
+    "pyautogui": PyAutoGUIBackend,
+    "mss": MSSBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(settings):
+    """
+    Builds the backend described by the "capture" section of settings.json, e.g.
+    {"backend": "mss"}, {"backend": "replay", "replay_source": "recordings/armor"} or
+    {"backend": "mss", "record_dir": "recordings/armor"}.
+    """
+    name = settings.get("backend", "pyautogui")
+    if name == "replay":
+        backend = ReplayBackend(settings.get("replay_source", "recordings"), settings.get("loop", True),
+                                settings.get("advance_on_grab", True))
+    elif name == "mss" and mss is None:
+        print("Warning: mss is not installed. Falling back to pyautogui capture.")
+        backend = PyAutoGUIBackend()
+    elif name in BACKENDS:
+        backend = BACKENDS[name]()
+    else:
+        raise ConfigurationError(f"Unknown capture backend '{name}'. Choose from {list(BACKENDS) + ['replay']}.")
+
+    if settings.get("record_dir"):
+        backend = RecordingBackend(backend, settings["record_dir"])
+    return backend
+
+
+def get_backend():
+    """Returns the active capture backend, building it from settings.json on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend(ConfigManager().get_section("capture"))
+            print(f"Screen capture backend: {_backend.name}")
+        return _backend
+
+
+def set_backend(backend):
+    """Replaces the active capture backend (e.g. a ReplayBackend in benchmarks). Returns the old one."""
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+    return previous
+
+
+@traced("capture", "capture", ("roi_coords",))
+def grab_frame(roi_coords):
+    """
+    Captures an ROI from the screen.
+    roi_coords: (left, top, width, height)
+    Returns the region as a BGR NumPy array.
+    """
+    frame = get_backend().grab(roi_coords)
+    if frame is None or frame.size == 0:
+        raise ConfigurationError(f"Captured frame is empty at {roi_coords}.")
+
+    return frame
+
+
+class FrameGrab:
+    """
+    A single capture covering several ROIs.
+    view() returns a NumPy slice of the shared frame for one ROI: no copy and no
+    per-ROI color conversion.
+    """
+    def __init__(self, frame, origin):
+        self.frame = frame
+        self.left, self.top = origin
+
+    def contains(self, roi_coords):
+        left, top, width, height = roi_coords
+        frame_h, frame_w = self.frame.shape[:2]
+        return (left >= self.left and top >= self.top and
+                left + width <= self.left + frame_w and top + height <= self.top + frame_h)
+
+    def view(self, roi_coords):
+        if not self.contains(roi_coords):
+            raise ConfigurationError(f"ROI {roi_coords} is outside the captured area.")
+        left, top, width, height = roi_coords
+        x, y = left - self.left, top - self.top
+        return self.frame[y:y + height, x:x + width]
+
+
+def union_region(rois):
+    """Smallest (left, top, width, height) box containing every ROI."""
+    left = min(roi[0] for roi in rois)
+    top = min(roi[1] for roi in rois)
+    right = max(roi[0] + roi[2] for roi in rois)
+    bottom = max(roi[1] + roi[3] for roi in rois)
+    return left, top, right - left, bottom - top
+
+
+def grab_rois(rois):
+    """Captures the union of the given ROIs once. Invalid (unset) ROIs are ignored."""
+    valid = [roi for roi in rois if roi and all(v > 0 for v in roi[2:])]
+    if not valid:
+        raise ConfigurationError(f"No valid ROI to capture in {rois}.")
+
+    region = union_region(valid)
+    return FrameGrab(grab_frame(region), region[:2])
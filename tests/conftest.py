@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# environment_setup logs to a file in the working directory and sends stdout/stderr into that
+# log as soon as it is imported: keep the log out of the checkout and give pytest its streams back
+_stdout, _stderr, _cwd = sys.stdout, sys.stderr, os.getcwd()
+os.chdir(tempfile.mkdtemp(prefix="hdlm-tests-"))
+try:
+    import environment_setup  # noqa: F401
+finally:
+    os.chdir(_cwd)
+    sys.stdout, sys.stderr = _stdout, _stderr
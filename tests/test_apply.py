@@ -0,0 +1,43 @@
+import json
+import os
+
+import pytest
+
+from conftest import REPO_ROOT
+from game_simulator import GameSimulator, make_databases, loadout_items, write_databases
+from loadout_selection import LoadoutManager, apply_loadout
+from utils import ConfigManager
+
+
+@pytest.fixture(scope="module")
+def loadout():
+    with open(os.path.join(REPO_ROOT, "loadouts", "gl_medic.json"), "r") as f:
+        return json.load(f)
+
+
+def run_apply(loadout, folder, greyed_boosters=()):
+    dbs = make_databases(items_per_db=24, include=loadout_items(loadout))
+    with GameSimulator(dbs, greyed_boosters=greyed_boosters) as simulator:
+        write_databases(dbs, folder)
+        ConfigManager.overrides["controls"]["TRACE RUNS"] = False
+        manager = LoadoutManager(None, db_folder=folder)
+        apply_loadout(manager, loadout)
+    return simulator, manager
+
+
+def test_apply_equips_the_whole_loadout(loadout, tmp_path):
+    simulator, manager = run_apply(loadout, str(tmp_path))
+
+    assert not manager.degraded_dbs
+    assert simulator.stratagems == [loadout[f"stratagem_{num}"] for num in range(1, 5)]
+    for db_key in ("helmet", "cape", "primary", "secondary", "grenade"):
+        assert simulator.equipped[db_key] == loadout[db_key]
+    assert simulator.equipped["armor"] == loadout["armor"].split("(")[0].strip()
+    assert simulator.equipped["booster"] == loadout["boosters"][0]
+
+
+def test_apply_skips_boosters_another_player_brought(loadout, tmp_path):
+    simulator, manager = run_apply(loadout, str(tmp_path), greyed_boosters=loadout["boosters"][:2])
+
+    assert not manager.degraded_dbs
+    assert simulator.equipped["booster"] == loadout["boosters"][2]
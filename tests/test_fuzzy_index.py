@@ -0,0 +1,65 @@
+import random
+
+import pytest
+from thefuzz import fuzz
+
+from fuzzy_index import MatchIndex
+from game_simulator import make_databases
+
+
+def linear_scan(keys, target_name):
+    """The scan MatchIndex replaced: every key scored, first best key wins."""
+    target_clean = target_name.upper().strip()
+    best_match = None
+    highest_score = 0
+    for key in keys:
+        clean_key = key.split('(')[0].strip().upper()
+        score = fuzz.WRatio(target_clean, clean_key)
+        if target_clean in clean_key:
+            score += 5
+        if score > highest_score:
+            highest_score = score
+            best_match = key
+    return best_match, highest_score
+
+
+def misread(name, rng):
+    """One character dropped, one swapped for a look-alike and sometimes a stray suffix."""
+    chars = list(name)
+    del chars[rng.randrange(len(chars))]
+    lookalikes = {"O": "0", "I": "1", "S": "5", "B": "8", "V": "U", "E": "F"}
+    spots = [idx for idx, char in enumerate(chars) if char in lookalikes]
+    if spots:
+        idx = rng.choice(spots)
+        chars[idx] = lookalikes[chars[idx]]
+    return "".join(chars) + rng.choice(["", "", " (1-2)", " ."])
+
+
+def queries(keys, rng):
+    names = rng.sample(keys, min(40, len(keys)))
+    yield from names
+    yield from (name.lower() + "  " for name in names[:5])
+    yield from (misread(name, rng) for name in names)
+    yield from (name.split()[-1] for name in names)
+    yield from (name.split()[0] for name in names)
+    yield from ("", " ", "???", "XQZJ", "ORBITAL", "12")
+
+
+@pytest.mark.parametrize("db_key", ["stratagems", "primary", "armor", "booster"])
+def test_best_match_agrees_with_the_linear_scan(db_key):
+    rng = random.Random(db_key)
+    keys = list(make_databases(items_per_db=150, seed=3)[db_key])
+    # Keys as the mapper writes some of them, with a position suffix
+    keys += [f"{key} ({idx}-1)" for idx, key in enumerate(keys[:10])]
+    index = MatchIndex(keys)
+
+    for target in queries(keys, rng):
+        assert index.best_match(target) == linear_scan(keys, target), target
+
+
+def test_first_key_wins_ties():
+    keys = ["G-6 FRAG", "G-12 HIGH EXPLOSIVE", "G-6 FRAG (2-1)"]
+    index = MatchIndex(keys)
+
+    assert index.best_match("G-6 FRAG") == ("G-6 FRAG", 105)
+    assert index.best_match("FRAG") == linear_scan(keys, "FRAG")
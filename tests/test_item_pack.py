@@ -0,0 +1,73 @@
+import json
+import os
+
+from fuzzy_index import MatchIndex
+from game_simulator import make_databases, write_databases
+from item_pack import ItemPack, PackedDatabase, write_pack
+from item_store import DB_FILES, ItemDatabaseStore
+from nav_planner import GridModel
+
+
+def test_pack_round_trip(tmp_path):
+    dbs = make_databases(items_per_db=30, seed=5)
+    dbs["primary"]["AR-23 LIBERATOR"] = {"cat": "ASSAULT RIFLE", "pos": [7, 0], "firemodes": ["AUTO", "BURST"]}
+    grids = {"primary": {"ASSAULT RIFLE": GridModel([4, 4, 2], uncertain_rows=[2])}}
+    path = str(tmp_path / "items.store")
+    write_pack(path, {db_key: (db, grids.get(db_key, {}), (123456789, len(db))) for db_key, db in dbs.items()})
+
+    pack = ItemPack(path)
+    assert set(pack.sections) == set(dbs)
+    for db_key, db in dbs.items():
+        packed = pack.database(db_key)
+        assert list(packed) == list(db)
+        assert dict(packed.items()) == db
+        assert pack.stamp(db_key) == (123456789, len(db))
+    assert pack.database("primary")["AR-23 LIBERATOR"]["firemodes"] == ["AUTO", "BURST"]
+    assert pack.grids("primary")["ASSAULT RIFLE"].to_dict() == grids["primary"]["ASSAULT RIFLE"].to_dict()
+    assert pack.grids("booster") == {}
+
+    keys = list(dbs["stratagems"])
+    index = pack.index("stratagems")
+    rebuilt = MatchIndex(keys)
+    for target in keys[:10] + [key.split()[-1] for key in keys[:10]] + ["ORBITAL", "SG-7"]:
+        assert index.best_match(target) == rebuilt.best_match(target)
+
+
+def test_store_serves_the_pack_only_while_it_matches_the_json(tmp_path):
+    folder = str(tmp_path)
+    dbs = make_databases(items_per_db=20, seed=6)
+    write_databases(dbs, folder)
+
+    first = ItemDatabaseStore(folder)
+    first.refresh()
+    assert os.path.exists(first.pack_path)
+
+    # A later start maps the pack instead of parsing the JSON files
+    second = ItemDatabaseStore(folder)
+    second.refresh()
+    assert all(isinstance(second.dbs[db_key], PackedDatabase) for db_key in DB_FILES)
+
+    # An edited JSON file no longer matches its stamp and is parsed (and packed) again
+    dbs["grenade"]["G-6 FRAG"] = {"cat": "STANDARD", "pos": [9, 0]}
+    with open(os.path.join(folder, DB_FILES["grenade"]), "w") as f:
+        json.dump(dbs["grenade"], f, indent=4)
+    third = ItemDatabaseStore(folder)
+    third.open_pack()
+    assert third.pack.stamp("grenade") != third._stamp("grenade")
+    assert third.pack.stamp("primary") == third._stamp("primary")
+    third.refresh()
+    assert "G-6 FRAG" in third.dbs["grenade"]
+    assert third.pack.stamp("grenade") == third._stamp("grenade")
+    assert dict(third.dbs["grenade"].items()) == dbs["grenade"]
+
+
+def test_unreadable_pack_falls_back_to_the_json_files(tmp_path):
+    folder = str(tmp_path)
+    dbs = make_databases(items_per_db=10, seed=7)
+    write_databases(dbs, folder)
+    with open(os.path.join(folder, "items.store"), "wb") as f:
+        f.write(b"not a store")
+
+    store = ItemDatabaseStore(folder)
+    store.refresh()
+    assert dict(store.dbs["cape"].items()) == dbs["cape"]
@@ -0,0 +1,76 @@
+import os
+
+import loadout_watcher
+from loadout_watcher import EVENT_HEADER, LoadoutWatcher
+
+
+def event(mask, name=""):
+    """One inotify event as the kernel lays it out: header, then the name padded with NULs."""
+    raw = name.encode()
+    if raw:
+        raw += b"\0" * (16 - len(raw) % 16)
+    return EVENT_HEADER.pack(1, mask, 0, len(raw)) + raw
+
+
+def watcher(folder, known=()):
+    watcher = LoadoutWatcher(str(folder), on_events=None)
+    watcher._known = set(known)
+    return watcher
+
+
+def test_parse_reports_each_file_once(tmp_path):
+    parsed = watcher(tmp_path, known=["old.json", "edited.json"])
+    buffer = b"".join([
+        event(loadout_watcher.IN_CREATE, "new.json"),
+        event(loadout_watcher.IN_CLOSE_WRITE, "new.json"),
+        event(loadout_watcher.IN_CLOSE_WRITE, "new.json"),
+        event(loadout_watcher.IN_CLOSE_WRITE, "edited.json"),
+        event(loadout_watcher.IN_DELETE, "old.json"),
+        event(loadout_watcher.IN_CLOSE_WRITE, "notes.txt"),
+    ])
+
+    events, folder_gone = parsed._parse(buffer)
+    assert sorted(events) == [("added", "new.json"), ("modified", "edited.json"), ("removed", "old.json")]
+    assert not folder_gone
+    assert parsed._known == {"new.json", "edited.json"}
+
+
+def test_parse_follows_renames(tmp_path):
+    parsed = watcher(tmp_path, known=["a.json"])
+    # A sync client writing a temporary file and renaming it over the loadout
+    buffer = b"".join([
+        event(loadout_watcher.IN_CLOSE_WRITE, ".a.json.tmp"),
+        event(loadout_watcher.IN_MOVED_FROM, ".a.json.tmp"),
+        event(loadout_watcher.IN_MOVED_TO, "a.json"),
+        event(loadout_watcher.IN_MOVED_FROM, "b.json"),
+    ])
+
+    events, _ = parsed._parse(buffer)
+    assert events == [("modified", "a.json")]
+
+    events, _ = parsed._parse(event(loadout_watcher.IN_MOVED_FROM, "a.json"))
+    assert events == [("removed", "a.json")]
+    assert parsed._known == set()
+
+
+def test_parse_reports_the_folder_going_away(tmp_path):
+    parsed = watcher(tmp_path, known=["a.json"])
+    buffer = event(loadout_watcher.IN_DELETE, "a.json") + event(loadout_watcher.IN_DELETE_SELF) + \
+        event(loadout_watcher.IN_IGNORED)
+
+    events, folder_gone = parsed._parse(buffer)
+    assert events == [("removed", "a.json")]
+    assert folder_gone
+
+
+def test_overflow_rescans_the_folder(tmp_path):
+    for name in ("kept.json", "added.json"):
+        (tmp_path / name).write_text("{}")
+    parsed = watcher(tmp_path, known=["kept.json", "gone.json"])
+    parsed._stamps = {"kept.json": parsed._snapshot()["kept.json"], "gone.json": (0, 2)}
+
+    events, folder_gone = parsed._parse(event(loadout_watcher.IN_Q_OVERFLOW))
+    assert sorted(events) == [("added", "added.json"), ("removed", "gone.json")]
+    assert not folder_gone
+    assert parsed._known == {"kept.json", "added.json"}
+    assert set(parsed._stamps) == set(os.listdir(tmp_path))
@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+import database_mapper
+from game_simulator import GameSimulator, make_databases
+from item_store import DB_FILES
+from loadout_selection import LoadoutManager
+from mapping_journal import MappingJournal, journal_path
+from utils import ConfigManager
+
+
+class Interrupted(Exception):
+    pass
+
+
+def test_journal_round_trip(tmp_path):
+    db_path = str(tmp_path / "primary_db.json")
+    journal = MappingJournal(db_path, ["ASSAULT RIFLE", "SHOTGUN"])
+    journal.master_db["AR-23 LIBERATOR"] = {"cat": "ASSAULT RIFLE", "pos": [0, 0]}
+    journal.record_row("ASSAULT RIFLE", 4, uncertain=False)
+    journal.record_row("ASSAULT RIFLE", 2, uncertain=True)
+    journal.finish_category("ASSAULT RIFLE")
+    assert journal_path(db_path) == str(tmp_path / "primary_db.journal.json")
+
+    loaded = MappingJournal.load(db_path, ["ASSAULT RIFLE", "SHOTGUN"])
+    assert loaded.master_db == journal.master_db
+    assert loaded.grid("ASSAULT RIFLE") == {"row_lengths": [4, 2], "uncertain_rows": [1]}
+    assert loaded.rows_done("SHOTGUN") == 0
+    assert loaded.done == ["ASSAULT RIFLE"]
+
+    # A journal of a different mapping is not resumed
+    assert MappingJournal.load(db_path, ["SHOTGUN"]) is None
+
+    loaded.discard()
+    assert not MappingJournal.exists(db_path)
+    assert MappingJournal.load(db_path) is None
+
+
+@pytest.mark.parametrize("db_key, stop_after", [("booster", 25), ("primary", 15), ("primary", 45)])
+def test_interrupted_mapping_resumes_where_it_stopped(db_key, stop_after, tmp_path, monkeypatch):
+    monkeypatch.setattr(database_mapper.tracing, "sleep", lambda *args, **kwargs: None)
+    folder = str(tmp_path)
+    db_path = os.path.join(folder, DB_FILES[db_key])
+    dbs = make_databases(items_per_db=60, seed=2)
+
+    with GameSimulator(dbs) as simulator:
+        ConfigManager.overrides["controls"]["TRACE RUNS"] = False
+        manager = LoadoutManager(None, db_folder=folder)
+        press_key = simulator.press_key
+
+        def failing_press(key):
+            if len(simulator.key_log) >= stop_after:
+                raise Interrupted()
+            press_key(key)
+
+        simulator.press_key = failing_press
+        simulator.open_menu(db_key, at_start=True)
+        with pytest.raises(Interrupted):
+            manager.run_mapper_by_key(db_key)
+        assert not os.path.exists(db_path)
+        with open(journal_path(db_path), "r") as f:
+            assert json.load(f)["master_db"]
+
+        # The player opens the menu again and starts the mapper again
+        simulator.press_key = press_key
+        simulator.key_log.clear()
+        simulator.open_menu(db_key, at_start=True)
+        manager.run_mapper_by_key(db_key)
+
+    with open(db_path, "r") as f:
+        assert json.load(f) == dbs[db_key]
+    assert not MappingJournal.exists(db_path)
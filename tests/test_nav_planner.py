@@ -0,0 +1,91 @@
+import itertools
+import json
+
+import pytest
+
+from nav_planner import GridModel, grid_metadata_path, load_grid_metadata, plan_moves, save_grid_metadata, \
+    shortest_route
+
+
+def replay(start, route, model, allow_wrap=True):
+    """Follows a route move by move, failing on any move the model doesn't allow."""
+    pos = tuple(start)
+    for direction in route:
+        moves = dict(model.neighbours(pos, allow_wrap))
+        assert direction in moves, f"{direction} is not a safe move from {pos}"
+        pos = moves[direction]
+    return pos
+
+
+def cells(model):
+    return [(row, col) for row, length in enumerate(model.row_lengths) for col in range(length)]
+
+
+@pytest.mark.parametrize("model", [
+    GridModel([4, 4, 2]),
+    GridModel([5, 3, 5, 1], column_overflow="clamp"),
+    GridModel([5, 3, 5, 1], column_overflow="block"),
+    GridModel([3, 3, 3, 2], wrap_columns=True),
+    GridModel([6, 6, 4], uncertain_rows=[2]),
+], ids=["ragged", "ragged-clamp", "ragged-block", "flat-wrapping", "uncertain"])
+def test_every_route_lands_on_its_target(model):
+    for start, target in itertools.product(cells(model), repeat=2):
+        route = shortest_route(start, target, model)
+        assert route is not None, (start, target)
+        assert replay(start, route, model) == target
+
+
+def test_clamp_lands_on_the_last_cell_of_a_shorter_row():
+    model = GridModel([4, 4, 2], column_overflow="clamp")
+    assert shortest_route((0, 3), (2, 1), model) == ["DOWN", "DOWN"]
+
+
+def test_shorter_rows_are_not_entered_vertically_by_default():
+    model = GridModel([4, 4, 2])
+    assert model.column_overflow == "block"
+    assert ("DOWN", (2, 1)) not in model.neighbours((1, 3))
+    route = shortest_route((0, 3), (2, 1), model)
+    assert len(route) == 4
+    assert replay((0, 3), route, model) == (2, 1)
+    assert GridModel.from_dict({"row_lengths": [4, 4, 2]}).column_overflow == "block"
+
+
+def test_version_1_metadata_does_not_trust_its_clamp(tmp_path):
+    db_path = str(tmp_path / "primary_db.json")
+    with open(grid_metadata_path(db_path), "w") as f:
+        json.dump({"version": 1, "categories": {"SHOTGUN": {"row_lengths": [4, 2], "column_overflow": "clamp"}}}, f)
+    assert load_grid_metadata(db_path)["SHOTGUN"].column_overflow == "block"
+
+    # A probed or hand-set clamp in a current file is kept
+    save_grid_metadata(db_path, {"SHOTGUN": GridModel([4, 2], column_overflow="clamp")})
+    assert load_grid_metadata(db_path)["SHOTGUN"].column_overflow == "clamp"
+
+
+def test_rows_wrap_around():
+    model = GridModel([5, 5, 5])
+    assert shortest_route((0, 0), (0, 4), model) == ["LEFT"]
+    assert shortest_route((1, 4), (1, 0), model) == ["RIGHT"]
+    assert shortest_route((0, 0), (0, 4), model, allow_wrap=False) == ["RIGHT"] * 4
+
+
+def test_uncertain_rows_are_not_wrapped():
+    model = GridModel([5, 5], uncertain_rows=[1])
+    assert shortest_route((1, 0), (1, 4), model) == ["UP", "LEFT", "DOWN"]
+    assert shortest_route((0, 0), (0, 4), model) == ["LEFT"]
+
+
+def test_only_flat_grids_wrap_columns():
+    flat = GridModel([3, 3, 3, 3], wrap_columns=True)
+    tabbed = GridModel([3, 3, 3, 3])
+    assert shortest_route((0, 1), (3, 1), flat) == ["UP"]
+    assert shortest_route((0, 1), (3, 1), tabbed) == ["DOWN"] * 3
+
+
+def test_plan_moves_falls_back_to_direct_moves_outside_the_model():
+    model = GridModel([3, 3])
+    assert shortest_route((0, 0), (4, 1), model) is None
+    assert plan_moves([0, 0], [4, 1], model) == ["s", "s", "s", "s", "d"]
+    assert plan_moves([1, 2], [0, 0], model) == ["w", "d"]
+    # Sideways to the smaller column first, so a short row is never entered past its end
+    assert plan_moves([0, 3], [5, 1], model) == ["a", "a", "s", "s", "s", "s", "s"]
+    assert plan_moves([5, 1], [0, 3], model) == ["w", "w", "w", "w", "w", "d", "d"]
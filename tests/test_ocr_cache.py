@@ -0,0 +1,73 @@
+import cv2
+import numpy as np
+import pytest
+
+from database_mapper import recognize_frames
+from ocr_cache import DiskFrameCache, disk_cache, frame_cache
+from recognizers import Recognizer, recognizer_chain, set_recognizers
+
+
+class CountingRecognizer(Recognizer):
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def recognize(self, frame, roi_key=None):
+        self.calls += 1
+        return f"TEXT {self.calls}"
+
+
+@pytest.fixture
+def recognizer():
+    previous = list(recognizer_chain.recognizers)
+    counting = CountingRecognizer()
+    set_recognizers([counting])
+    frame_cache.clear()
+    disk_cache.detach()
+    yield counting
+    set_recognizers(previous)
+    frame_cache.clear()
+
+
+def crop(text, border=None):
+    frame = np.full((32, 480, 3), 20, np.uint8)
+    cv2.putText(frame, text, (10, 23), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (235, 235, 235), 1, cv2.LINE_AA)
+    if border is not None:
+        cv2.rectangle(frame, (0, 0), (479, 31), border, 2)
+    return frame
+
+
+def test_overlay_border_does_not_miss_the_cache(recognizer):
+    first = recognize_frames({"item": (crop("AR-23 LIBERATOR"), None)})["item"]
+    for border in [(0, 255, 0), (0, 120, 0), (255, 255, 255)]:
+        assert recognize_frames({"item": (crop("AR-23 LIBERATOR", border), None)})["item"] == first
+    assert recognizer.calls == 1
+
+    # A different text is still read
+    assert recognize_frames({"item": (crop("SG-225 BREAKER", (0, 255, 0)), None)})["item"] != first
+    assert recognizer.calls == 2
+
+
+def test_disk_cache_opens_its_file_on_first_use(tmp_path):
+    path = tmp_path / "ocr_cache.npy"
+    cache = DiskFrameCache(str(path), max_entries=16)
+    assert not path.exists()
+
+    digest = bytes(range(16))
+    assert cache.get(digest) is None
+    assert path.exists()
+    cache.put(digest, "AR-23 LIBERATOR")
+    cache.flush()
+
+    assert DiskFrameCache(str(path), max_entries=16).get(digest) == "AR-23 LIBERATOR"
+
+
+def test_detached_disk_cache_never_creates_its_file(tmp_path):
+    path = tmp_path / "ocr_cache.npy"
+    cache = DiskFrameCache(str(path), max_entries=16)
+    cache.detach()
+    cache.put(bytes(16), "AR-23 LIBERATOR")
+
+    assert cache.get(bytes(16)) is None
+    assert not path.exists()
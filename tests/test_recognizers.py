@@ -0,0 +1,34 @@
+import cv2
+import numpy as np
+
+from recognizers import TemplateRecognizer, binarize_text
+
+
+def text_crop(text, size=(32, 480), border=None):
+    """A dark ROI crop with light text, optionally with the overlay's 2 px border on its edge."""
+    frame = np.full((*size, 3), (14, 18, 22), np.uint8)
+    cv2.putText(frame, text, (10, size[0] - 9), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (235, 235, 235), 1, cv2.LINE_AA)
+    if border is not None:
+        overlay = frame.copy()
+        cv2.rectangle(overlay, (0, 0), (size[1] - 1, size[0] - 1), (0, 255, 0), 2)
+        frame = cv2.addWeighted(overlay, border, frame, 1 - border, 0)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+def test_overlay_border_is_not_part_of_the_template():
+    clean = binarize_text(text_crop("AR-23 LIBERATOR"))
+    for alpha in (0.3, 0.6, 1.0):
+        bordered = binarize_text(text_crop("AR-23 LIBERATOR", border=alpha))
+        assert bordered.shape == clean.shape
+        assert binarize_text(text_crop("", border=alpha)) is None
+
+
+def test_templates_learned_under_the_overlay_match_clean_crops():
+    recognizer = TemplateRecognizer()
+    names = ["AR-23 LIBERATOR", "SG-225 BREAKER", "R-63 DILIGENCE", "PLAS-1 SCORCHER"]
+    for name in names:
+        recognizer.learn(text_crop(name, border=0.8), "TEST_BORDERED_ITEM_ROI", name)
+
+    for name in names:
+        assert recognizer.recognize(text_crop(name), "TEST_BORDERED_ITEM_ROI") == name
+        assert recognizer.recognize(text_crop(name, border=0.4), "TEST_BORDERED_ITEM_ROI") == name
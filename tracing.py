@@ -0,0 +1,172 @@
+import functools
+import glob
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from environment_setup import get_base_path
+from utils import ConfigManager
+
+# Trace files kept in the traces folder; older ones are deleted
+MAX_TRACES = 20
+
+
+class _NullSpan:
+    """Returned while no run is being traced, so spans cost next to nothing."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.record(self, end)
+        return False
+
+    def set(self, **args):
+        """Adds results to the span, e.g. the text a read returned."""
+        self.args.update(args)
+
+
+class Tracer:
+    """
+    Collects timing spans as Chrome trace events ("X" complete events, microseconds).
+    Spans are only recorded between start() and stop(), i.e. inside trace_run().
+    """
+    def __init__(self):
+        self.events = None
+        self._origin = 0.0
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    @property
+    def recording(self):
+        return self.events is not None
+
+    def span(self, name, category="app", **args):
+        if self.events is None:
+            return NULL_SPAN
+        return Span(self, name, category, args)
+
+    def record(self, span, end):
+        thread = threading.current_thread()
+        event = {
+            "name": span.name,
+            "cat": span.category,
+            "ph": "X",
+            "ts": round((span.start - self._origin) * 1e6, 1),
+            "dur": round((end - span.start) * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": thread.ident,
+            "args": {key: value if isinstance(value, (int, float, bool, type(None))) else str(value)
+                     for key, value in span.args.items()}
+        }
+        with self._lock:
+            if self.events is not None:
+                self.events.append(event)
+                self._threads[thread.ident] = thread.name
+
+    def start(self):
+        with self._lock:
+            self.events = []
+            self._threads = {}
+            self._origin = time.perf_counter()
+
+    def stop(self):
+        """Stops recording and returns the trace events, thread names included."""
+        with self._lock:
+            events, self.events = self.events or [], None
+            names = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+                     for tid, name in self._threads.items()]
+        return names + events
+
+
+tracer = Tracer()
+
+
+def traced(name=None, category="app", arg_names=()):
+    """Decorator: records every call as a span, with the listed arguments attached."""
+    def decorator(fn):
+        span_name = name or fn.__name__
+        signature = inspect.signature(fn) if arg_names else None
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not tracer.recording:
+                return fn(*args, **kwargs)
+            span_args = {}
+            if signature is not None:
+                bound = signature.bind_partial(*args, **kwargs).arguments
+                span_args = {arg: bound[arg] for arg in arg_names if arg in bound}
+            with tracer.span(span_name, category, **span_args):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _write_trace(events, name, folder):
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    # Keep the folder from growing forever
+    for old_trace in sorted(glob.glob(os.path.join(folder, "*.json")), key=os.path.getmtime)[:-MAX_TRACES]:
+        os.remove(old_trace)
+    return path
+
+
+@contextmanager
+def trace_run(name, folder=None):
+    """
+    Records every span until the block exits and writes them to traces/<name>_<time>.json,
+    which chrome://tracing or ui.perfetto.dev can open. A run inside a run is just a span.
+    Set the "TRACE RUNS" control to false to turn the files off.
+    """
+    if tracer.recording or not ConfigManager().get_control("TRACE RUNS", True):
+        with tracer.span(name, "run"):
+            yield
+        return
+
+    tracer.start()
+    try:
+        with tracer.span(name, "run"):
+            yield
+    finally:
+        events = tracer.stop()
+        try:
+            path = _write_trace(events, name, folder or os.path.join(get_base_path(), "traces"))
+            print(f"Trace written to {path} ({len(events)} events)")
+        except OSError as e:
+            print(f"Warning: could not write the trace ({e})")
+
+
+def sleep(seconds, reason="sleep"):
+    """time.sleep() that shows up in the trace."""
+    with tracer.span(reason, "wait", seconds=seconds):
+        time.sleep(seconds)
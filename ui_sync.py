@@ -0,0 +1,93 @@
+import time
+
+import key_input
+from ocr_cache import frame_signature, signature_distance
+from screen_capture import grab_frame
+from tracing import traced
+
+# How often the ROI is sampled while waiting for the UI
+POLL_INTERVAL = 0.01
+# A frame this different from the baseline means the key press landed
+CHANGE_THRESHOLD = 40
+# Consecutive frames closer than this mean the animation has finished
+STABLE_THRESHOLD = 12
+STABLE_POLLS = 2
+# Pixels ignored around the ROI edge, where the green ROIOverlay border fades out
+EDGE_MARGIN = 3
+
+
+def is_valid_roi(roi_coords):
+    return bool(roi_coords) and all(v > 0 for v in roi_coords[2:])
+
+
+def trim_edges(frame):
+    """The crop without its EDGE_MARGIN border, so the overlay can't make two captures differ."""
+    if min(frame.shape[:2]) > EDGE_MARGIN * 4:
+        return frame[EDGE_MARGIN:-EDGE_MARGIN, EDGE_MARGIN:-EDGE_MARGIN]
+    return frame
+
+
+def roi_signature(roi_coords):
+    """Cheap fingerprint of what the ROI currently shows."""
+    return frame_signature(trim_edges(grab_frame(roi_coords)))
+
+
+@traced("settle", "wait", ("timeout",))
+def wait_until_settled(roi_coords, timeout, baseline=None):
+    """
+    Returns as soon as the ROI has changed from `baseline` and then stopped changing.
+    With no baseline it only waits for the ROI to stop changing.
+    The configured delay is the timeout, so the worst case is the old fixed sleep.
+    Returns True if the UI settled, False if the timeout ran out.
+    """
+    if not is_valid_roi(roi_coords):
+        # Nothing to watch: fall back to the fixed delay
+        time.sleep(timeout)
+        return False
+
+    deadline = time.perf_counter() + timeout
+    changed = baseline is None
+    previous = None
+    stable = 0
+
+    while True:
+        signature = roi_signature(roi_coords)
+
+        if not changed and signature_distance(signature, baseline) > CHANGE_THRESHOLD:
+            changed = True
+            previous = None
+
+        if changed and previous is not None:
+            if signature_distance(signature, previous) <= STABLE_THRESHOLD:
+                stable += 1
+                if stable >= STABLE_POLLS:
+                    return True
+            else:
+                stable = 0
+        previous = signature
+
+        if time.perf_counter() >= deadline:
+            return False
+        time.sleep(POLL_INTERVAL)
+
+
+@traced("key burst", "input", ("keys",))
+def press_sequence(keys, key_rate):
+    """
+    Sends a whole key sequence in one burst at `key_rate` presses per second.
+    Bypasses pydirectinput's per-call PAUSE; each key is held for half a period
+    so the game sees it on at least one frame.
+    """
+    half_period = 0.5 / key_rate
+    for key in keys:
+        key_input.key_down(key)
+        time.sleep(half_period)
+        key_input.key_up(key)
+        time.sleep(half_period)
+
+
+def press_and_settle(key, roi_coords, timeout):
+    """Presses a key and waits for the ROI to react to it (at most `timeout` seconds)."""
+    baseline = roi_signature(roi_coords) if is_valid_roi(roi_coords) else None
+    key_input.press(key)
+    return wait_until_settled(roi_coords, timeout, baseline=baseline)
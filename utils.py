@@ -3,7 +3,6 @@ import os
 from tkinter import messagebox
 from functools import partial
 
-import pygetwindow as gw
 import tkinter as tk
 from environment_setup import get_base_path
 
@@ -28,8 +27,19 @@ class ConfigurationError(Exception):
 
     pass
 
+class RegionOfInterest(tuple):
+    """
+    A (left, top, width, height) tuple that also remembers which settings.json key it came from,
+    so per-ROI data (templates, OCR settings) can be looked up from the coordinates alone.
+    """
+    def __new__(cls, coords, key=None):
+        roi = super().__new__(cls, coords)
+        roi.key = key
+        return roi
+
 def focus_hd2_win():
     print("Switching to Helldivers 2...")
+    import pygetwindow as gw  # Windows only, so only imported when actually switching
 
     # Search for any window containing "Google Chrome"
     matches = gw.getWindowsWithTitle('HELLDIVERS™ 2')
@@ -43,6 +53,14 @@ def focus_hd2_win():
         print("No matching window found.")
 
 
+def write_json_atomic(path, data, indent=4):
+    """Writes JSON to a temp file and swaps it in, so readers never see a half-written file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=indent)
+    os.replace(tmp_path, path)
+
+
 def validate_loadout_files(loadout_folder):
     """Checks for missing keys or items not present in databases."""
 
@@ -152,34 +170,53 @@ class ROICalibrator:
         self.root.destroy()
 
 class ConfigManager:
+    # Settings layered over settings.json for this process only (e.g. the simulator's ROI layout)
+    overrides = {}
+    # False keeps every save in memory, so test runs never touch the user's settings.json
+    persist = True
+
     def __init__(self):
         self.basepath = get_base_path()
         self.filepath = os.path.join(self.basepath, "settings.json")
         self.data = self.load_config()
 
-    def load_config(self):
+    def read_file(self):
         if os.path.exists(self.filepath):
             with open(self.filepath, 'r') as f:
                 return json.load(f)
         return {"controls": {}, "rois": {}}
 
-    def save_config(self, new_data):
-        # Update existing data with new values
-        if "controls" in new_data:
-            self.data["controls"].update(new_data["controls"])
-        if "rois" in new_data:
-            self.data["rois"].update(new_data["rois"])
+    def load_config(self):
+        data = self.read_file()
+        for section, values in ConfigManager.overrides.items():
+            data.setdefault(section, {}).update(values)
+        return data
 
+    def save_config(self, new_data):
+        # Update existing data with new values, section by section
+        for section, values in new_data.items():
+            self.data.setdefault(section, {}).update(values)
+        if not ConfigManager.persist:
+            return
+
+        # Write on top of the file's contents so in-memory overrides are never saved
+        stored = self.read_file()
+        for section, values in new_data.items():
+            stored.setdefault(section, {}).update(values)
         with open(self.filepath, 'w') as f:
-            json.dump(self.data, f, indent=4)
+            json.dump(stored, f, indent=4)
 
     def get_roi(self, key, default):
         # Returns the saved ROI or the hardcoded default if not found
-        return tuple(self.data["rois"].get(key, default))
+        return RegionOfInterest(self.data["rois"].get(key, default), key)
 
     def get_control(self, key, default=None):
         return self.data["controls"].get(key, default)
 
+    def get_section(self, section):
+        # Whole settings block, e.g. "capture". Empty if the section was never saved.
+        return self.data.get(section, {})
+
 
 class ROIOverlay:
     def __init__(self, root_parent: tk.Tk):